@@ -7,7 +7,11 @@ sees Full Name + PIN.
 """
 
 import streamlit as st
-from app.supabase_client import get_supabase_client, get_service_client
+from app.supabase_client import (
+    get_supabase_client,
+    get_service_client,
+    mark_session_applied,
+)
 
 
 def _name_pin_to_email(full_name: str, pin: str) -> str:
@@ -68,20 +72,20 @@ def sign_in(full_name: str, pin: str) -> dict:
         st.session_state["user_id"] = str(user.id)
 
         client.auth.set_session(session.access_token, session.refresh_token)
-
-        profile = (
-            get_service_client()
-            .table("profiles")
-            .select("role, full_name")
-            .eq("id", str(user.id))
-            .single()
-            .execute()
-        )
-        st.session_state["role"] = profile.data["role"]
-        st.session_state["full_name"] = profile.data["full_name"]
+        mark_session_applied(session.access_token, session.refresh_token)
+
+        # The client now carries the user's JWT, so the profile read goes
+        # through RLS instead of a second, service-role client. The client is
+        # shared across sessions, so another sign-in can swap its JWT between
+        # set_session and this call; reject a profile that isn't this user's.
+        profile = client.rpc("get_my_profile").execute().data[0]
+        if profile["id"] != str(user.id):
+            return {"success": False, "error": "Sign-in was interrupted. Please try again."}
+        st.session_state["role"] = profile["role"]
+        st.session_state["full_name"] = profile["full_name"]
         st.session_state["authenticated"] = True
 
-        return {"success": True, "role": profile.data["role"]}
+        return {"success": True, "role": profile["role"]}
     except Exception as e:
         return {"success": False, "error": "Invalid name or PIN. Please try again."}
 
@@ -93,8 +97,9 @@ def sign_out():
         client.auth.sign_out()
     except Exception:
         pass
+    mark_session_applied(None)
     for key in [
-        "access_token", "refresh_token", "user_id", "role",
+        "access_token", "refresh_token", "user_id", "role", "role_display",
         "full_name", "authenticated", "current_page",
         "current_session_id", "current_case_id",
     ]:
@@ -109,5 +114,13 @@ def get_role() -> str:
     return st.session_state.get("role", "")
 
 
+def get_role_display() -> str:
+    """Human-readable role label, computed once per sign-in and kept in session_state."""
+    if "role_display" not in st.session_state:
+        role = get_role()
+        st.session_state["role_display"] = "Patient Navigator" if role == "navigator" else role.title()
+    return st.session_state["role_display"]
+
+
 def get_user_id() -> str:
     return st.session_state.get("user_id", "")
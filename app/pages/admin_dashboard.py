@@ -7,7 +7,7 @@ and a data table of all loaded synthetic cases.
 
 import streamlit as st
 import pandas as pd
-from app.supabase_client import get_service_client
+from app.supabase_client import get_service_client, run_parallel
 
 
 ADMIN_PASSWORD = "DataGeneration"
@@ -28,35 +28,45 @@ def render():
                     st.error("Incorrect password.")
         return
 
-    client = get_service_client()
+    # The four reads are independent, so run them concurrently on the shared
+    # worker pool, with the same stale-connection retry as the other pages.
+    navigators, progress, total_cases_resp, cases = run_parallel(
+        get_service_client,
+        lambda client: (
+            client.table("profiles")
+            .select("id, full_name")
+            .eq("role", "navigator")
+            .execute()
+        ),
+        lambda client: (
+            client.table("navigator_progress_v15")
+            .select("navigator_id, completed, in_progress")
+            .execute()
+        ),
+        lambda client: (
+            client.table("synthetic_cases_v15")
+            .select("*", count="exact", head=True)
+            .execute()
+        ),
+        lambda client: (
+            client.table("synthetic_cases_v15")
+            .select("label, batch_id, narrative_summary, case_outcome, created_at")
+            .order("label")
+            .execute()
+        ),
+    )
 
     # ── Navigator Progress ───────────────────────────────────────────────────
     st.header("Navigator Progress")
 
-    navigators = (
-        client.table("profiles")
-        .select("id, full_name")
-        .eq("role", "navigator")
-        .execute()
-    )
-    sessions = (
-        client.table("evaluation_sessions_v15")
-        .select("navigator_id, status")
-        .execute()
-    )
-    total_cases_resp = (
-        client.table("synthetic_cases_v15")
-        .select("id", count="exact")
-        .execute()
-    )
     total_cases = total_cases_resp.count or 0
 
     progress_data = []
-    session_list = sessions.data or []
+    counts_by_nav = {row["navigator_id"]: row for row in (progress.data or [])}
     for nav in navigators.data or []:
-        nav_sessions = [s for s in session_list if s["navigator_id"] == nav["id"]]
-        completed = sum(1 for s in nav_sessions if s["status"] == "completed")
-        in_progress = sum(1 for s in nav_sessions if s["status"] == "in_progress")
+        counts = counts_by_nav.get(nav["id"], {})
+        completed = counts.get("completed", 0)
+        in_progress = counts.get("in_progress", 0)
         remaining = total_cases - completed - in_progress
         progress_data.append({
             "Navigator": nav["full_name"],
@@ -74,13 +84,6 @@ def render():
     # ── Synthetic Cases Table ────────────────────────────────────────────────
     st.header("Synthetic Cases")
 
-    cases = (
-        client.table("synthetic_cases_v15")
-        .select("label, batch_id, narrative_summary, case_outcome, created_at")
-        .order("label")
-        .execute()
-    )
-
     if cases.data:
         df = pd.DataFrame(cases.data)
         df["narrative_summary"] = df["narrative_summary"].str[:120] + "..."
@@ -7,25 +7,18 @@ Displays the case narrative and renders evaluation forms for all 3 formats:
   Format 3: RL Scenarios (rank 1 vs rank 0)
 
 On resume, loads previously saved answers from the database.
-Save Progress writes answers without completing. Submit finalises.
+Answers auto-save on every change; Submit finalises.
 """
 
+import json
 import streamlit as st
-from datetime import datetime, timezone
-from httpx import RemoteProtocolError
-from app.supabase_client import get_authenticated_client, get_service_client
+from app.supabase_client import (
+    get_authenticated_client,
+    get_service_client,
+    run_parallel,
+)
 
 
-def _retry(fn, retries=2):
-    """Retry a Supabase call on stale connection errors."""
-    for attempt in range(retries):
-        try:
-            return fn()
-        except RemoteProtocolError:
-            if attempt == retries - 1:
-                raise
-            st.cache_resource.clear()
-
 CLINICAL_ENV_OPTIONS = ["Improves", "Worsens", "Unchanged", "Unclear"]
 SERVICE_ADOPTION_OPTIONS = ["Negative", "Positive", "Unclear", "Unchanged"]
 EDD_DELTA_OPTIONS = [
@@ -38,121 +31,104 @@ EDD_DELTA_OPTIONS = [
     "- 7-14 Days",
     "- >14 Days",
 ]
-
-
-def _load_saved_answers(client, session_id):
-    """Fetch any previously saved evaluation answers for this session."""
-    f1_resp = _retry(lambda: (
-        client.table("eval_format_1_timeline_v15")
-        .select("*")
-        .eq("session_id", session_id)
-        .order("event_index")
-        .execute()
-    ))
-    f2_resp = _retry(lambda: (
-        client.table("eval_format_2_tactics_v15")
-        .select("*")
-        .eq("session_id", session_id)
-        .order("triple_index")
-        .execute()
-    ))
-    f3_resp = _retry(lambda: (
-        client.table("eval_format_3_boundaries_v15")
-        .select("*")
-        .eq("session_id", session_id)
-        .order("option_index")
-        .execute()
-    ))
-
-    f1_saved = {row["event_index"]: row for row in (f1_resp.data or [])}
-    f2_saved = {row["triple_index"]: row for row in (f2_resp.data or [])}
-    f3_saved = {row["option_index"]: row for row in (f3_resp.data or [])}
-
-    return f1_saved, f2_saved, f3_saved
-
-
-def _save_answers(session_id, f1_inputs, f2_inputs, f3_inputs,
-                   case_label="", navigator_name=""):
-    """Save current answers to eval tables (delete old rows first)."""
-    svc = get_service_client()
-    # Clear existing rows for this session
-    svc.table("eval_format_1_timeline_v15").delete().eq("session_id", session_id).execute()
-    svc.table("eval_format_2_tactics_v15").delete().eq("session_id", session_id).execute()
-    svc.table("eval_format_3_boundaries_v15").delete().eq("session_id", session_id).execute()
-
-    common = {"session_id": session_id, "case_label": case_label, "navigator_name": navigator_name}
-
-    # Insert current answers
-    if f1_inputs:
-        f1_rows = [{**common, **inp} for inp in f1_inputs]
-        svc.table("eval_format_1_timeline_v15").insert(f1_rows).execute()
-
-    if f2_inputs:
-        f2_rows = [{**common, **inp} for inp in f2_inputs]
-        svc.table("eval_format_2_tactics_v15").insert(f2_rows).execute()
-
-    if f3_inputs:
-        f3_rows = [{**common, **inp} for inp in f3_inputs]
-        svc.table("eval_format_3_boundaries_v15").insert(f3_rows).execute()
-
-
-def render():
-    client = get_authenticated_client()
-
-    session_id = st.session_state.get("current_session_id")
-    case_id = st.session_state.get("current_case_id")
-
-    if not session_id or not case_id:
-        st.error("No active evaluation session. Returning to dashboard.")
-        st.session_state["current_page"] = "pn_dashboard"
-        st.rerun()
-        return
-
-    if st.button("< Back to Dashboard"):
-        st.session_state["current_page"] = "pn_dashboard"
-        st.rerun()
-
-    # ── Fetch case data ──────────────────────────────────────────────────────
-    case_resp = (
-        client.table("synthetic_cases_v15")
-        .select("*")
+CATEGORY_OPTIONS = ["Passive", "Proactive", "Overstep"]
+
+# Option -> selectbox index, so saved answers map to defaults without list scans
+CLINICAL_ENV_IDX = {opt: i for i, opt in enumerate(CLINICAL_ENV_OPTIONS)}
+SERVICE_ADOPTION_IDX = {opt: i for i, opt in enumerate(SERVICE_ADOPTION_OPTIONS)}
+EDD_DELTA_IDX = {opt: i for i, opt in enumerate(EDD_DELTA_OPTIONS)}
+CATEGORY_IDX = {opt: i for i, opt in enumerate(CATEGORY_OPTIONS)}
+
+
+# Only the columns render() reads; skips created_at/batch_id/version etc.
+CASE_COLUMNS = (
+    "label, narrative_summary, role_delineation_check, atlantis_entry_confirmed, "
+    "demographic_audit_note, home_vs_ltc_goal, v_card_flyer_status, "
+    "pre_dc_pulse_call, atlantis_final_sync, case_outcome, "
+    "format_1_state_log, format_2_triples, format_3_rl_scenario"
+)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_case(case_id):
+    """Fetch a synthetic case. Cases don't change during a session, so cache per case_id."""
+    return (
+        get_service_client()
+        .table("synthetic_cases_v15")
+        .select(CASE_COLUMNS)
         .eq("id", case_id)
         .single()
         .execute()
+    ).data
+
+
+def _load_saved_answers(session_id):
+    """Fetch any previously saved answers and the session's overall assessment.
+
+    The get_saved_answers RPC (all three formats in one call) and the
+    evaluation_sessions_v15 read are independent, so they run concurrently.
+    """
+    answers_resp, session_resp = run_parallel(
+        get_authenticated_client,
+        lambda client: client.rpc("get_saved_answers", {"p_session_id": session_id}).execute(),
+        lambda client: (
+            client.table("evaluation_sessions_v15")
+            .select("overall_field_authenticity, authenticity_reasoning, improvement_suggestion")
+            .eq("id", session_id)
+            .single()
+            .execute()
+        ),
     )
-    case = case_resp.data
+    data = answers_resp.data or {}
 
-    # ── Get case_label and navigator_name from the session ───────────────────
-    case_label = case.get("label", "")
-    navigator_name = st.session_state.get("full_name", "")
+    f1_saved = {row["event_index"]: row for row in (data.get("f1") or [])}
+    f2_saved = {row["triple_index"]: row for row in (data.get("f2") or [])}
+    f3_saved = {row["option_index"]: row for row in (data.get("f3") or [])}
 
-    # ── Load any previously saved answers ─────────────────────────────────────
-    f1_saved, f2_saved, f3_saved = _load_saved_answers(client, session_id)
+    return f1_saved, f2_saved, f3_saved, session_resp.data or {}
 
-    st.header("Case Narrative")
-    st.info(case["narrative_summary"])
 
-    # ── V7 CHECKLIST FIELDS ───────────────────────────────────────────────────
-    with st.expander("PN 3-Stage Lifecycle Checklist", expanded=False):
-        st.markdown(f"**Role Delineation Check:** {case.get('role_delineation_check', 'N/A')}")
+def _changed_rows(inputs, saved):
+    """Return the input rows whose values differ from the saved row at the same index."""
+    changed = []
+    for i, inp in enumerate(inputs):
+        prior = saved.get(i, {})
+        if any(prior.get(k) != v for k, v in inp.items()):
+            changed.append(inp)
+    return changed
 
-        st.subheader("Stage 1: Entry & Triage")
-        st.markdown(f"**Atlantis Entry Confirmed:** {'Yes' if case.get('atlantis_entry_confirmed') else 'No'}")
-        st.markdown(f"**Demographic Audit:** {case.get('demographic_audit_note', 'N/A')}")
-        st.markdown(f"**Home vs LTC Goal:** {case.get('home_vs_ltc_goal', 'N/A')}")
-
-        st.subheader("Stage 2: Maintenance")
-        st.markdown(f"**V-Card & Flyer Status:** {case.get('v_card_flyer_status', 'N/A')}")
-
-        st.subheader("Stage 3: Handoff")
-        st.markdown(f"**Pre-DC Pulse Call:** {case.get('pre_dc_pulse_call', 'N/A')}")
-        st.markdown(f"**Atlantis Final Sync:** {case.get('atlantis_final_sync', 'N/A')}")
-
-        st.markdown(f"**Case Outcome:** `{case.get('case_outcome', 'N/A')}`")
 
-    state_log = case["format_1_state_log"]
-    triples = case["format_2_triples"]
-    rl_scenario = case["format_3_rl_scenario"]
+def _save_answers(session_id, f1_inputs, f2_inputs, f3_inputs,
+                   overall_score, authenticity_reasoning, improvement_suggestion,
+                   finalize=False):
+    """Save current answers and the overall assessment in one transactional RPC.
+
+    The save_evaluation function (see supabase_schema.sql) upserts the
+    session's eval rows on (session_id, *_index) and updates
+    evaluation_sessions_v15 server-side. Callers pass only changed rows;
+    case_label / navigator_name are filled in by a DB trigger.
+    finalize=True also marks the session completed.
+    """
+    get_service_client().rpc("save_evaluation", {
+        "p_session_id": session_id,
+        "p_overall": overall_score,
+        "p_reasoning": authenticity_reasoning,
+        "p_suggestion": improvement_suggestion,
+        "p_f1": f1_inputs,
+        "p_f2": f2_inputs,
+        "p_f3": f3_inputs,
+        "p_finalize": finalize,
+    }).execute()
+
+
+@st.fragment
+def _render_evaluation(session_id, saved_key, state_log, triples, rl_scenario):
+    """Render Formats 1-3 and the final assessment, auto-saving on every change.
+
+    Runs as a fragment so a widget change reruns only this block, not the
+    narrative and checklist above it.
+    """
+    f1_saved, f2_saved, f3_saved, session_saved = st.session_state[saved_key]
 
     # ── FORMAT 1: Timeline & Impact ──────────────────────────────────────────
     st.header("Format 1: State Log Evaluation")
@@ -171,45 +147,33 @@ def render():
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                ci_default = 0
-                if saved.get("clinical_impact") in CLINICAL_ENV_OPTIONS:
-                    ci_default = CLINICAL_ENV_OPTIONS.index(saved["clinical_impact"])
                 clinical_impact = st.selectbox(
                     "Clinical Impact",
                     CLINICAL_ENV_OPTIONS,
-                    index=ci_default,
+                    index=CLINICAL_ENV_IDX.get(saved.get("clinical_impact"), 0),
                     key=f"f1_clinical_{i}",
                 )
 
             with col2:
-                ei_default = 0
-                if saved.get("environmental_impact") in CLINICAL_ENV_OPTIONS:
-                    ei_default = CLINICAL_ENV_OPTIONS.index(saved["environmental_impact"])
                 environmental_impact = st.selectbox(
                     "Environmental Impact",
                     CLINICAL_ENV_OPTIONS,
-                    index=ei_default,
+                    index=CLINICAL_ENV_IDX.get(saved.get("environmental_impact"), 0),
                     key=f"f1_env_{i}",
                 )
 
             with col3:
-                sa_default = 0
-                if saved.get("home_service_adoption_impact") in SERVICE_ADOPTION_OPTIONS:
-                    sa_default = SERVICE_ADOPTION_OPTIONS.index(saved["home_service_adoption_impact"])
                 home_service_adoption = st.selectbox(
                     "Home Service Adoption Impact",
                     SERVICE_ADOPTION_OPTIONS,
-                    index=sa_default,
+                    index=SERVICE_ADOPTION_IDX.get(saved.get("home_service_adoption_impact"), 0),
                     key=f"f1_service_{i}",
                 )
 
-            edd_default = 0
-            if saved.get("edd_delta") in EDD_DELTA_OPTIONS:
-                edd_default = EDD_DELTA_OPTIONS.index(saved["edd_delta"])
             edd_delta = st.selectbox(
                 "EDD Delta",
                 EDD_DELTA_OPTIONS,
-                index=edd_default,
+                index=EDD_DELTA_IDX.get(saved.get("edd_delta"), 0),
                 key=f"f1_edd_{i}",
             )
 
@@ -263,7 +227,6 @@ def render():
     # ── FORMAT 3: RL Scenario ────────────────────────────────────────────────
     st.header("Format 3: RL Scenario Evaluation")
 
-    CATEGORY_OPTIONS = ["Passive", "Proactive", "Overstep"]
     f3_inputs = []
 
     for i, option in enumerate(rl_scenario):
@@ -272,13 +235,10 @@ def render():
             st.markdown(f"**Description:** {option['description']}")
 
             st.divider()
-            cat_default = 0
-            if saved_f3.get("pn_category") in CATEGORY_OPTIONS:
-                cat_default = CATEGORY_OPTIONS.index(saved_f3["pn_category"])
             pn_category = st.selectbox(
                 "Categorize this action:",
                 CATEGORY_OPTIONS,
-                index=cat_default,
+                index=CATEGORY_IDX.get(saved_f3.get("pn_category"), 0),
                 key=f"f3_cat_{i}",
             )
 
@@ -298,17 +258,10 @@ def render():
         "accurately reflect your lived experience in the field?"
     )
 
-    # Load saved values from session if resuming
-    session_resp = _retry(lambda: (
-        client.table("evaluation_sessions_v15")
-        .select("overall_field_authenticity, authenticity_reasoning, improvement_suggestion")
-        .eq("id", session_id)
-        .single()
-        .execute()
-    ))
-    saved_authenticity = session_resp.data.get("overall_field_authenticity") or 3
-    saved_reasoning = session_resp.data.get("authenticity_reasoning") or ""
-    saved_suggestion = session_resp.data.get("improvement_suggestion") or ""
+    # Saved values from the session if resuming
+    saved_authenticity = session_saved.get("overall_field_authenticity") or 3
+    saved_reasoning = session_saved.get("authenticity_reasoning") or ""
+    saved_suggestion = session_saved.get("improvement_suggestion") or ""
 
     overall_score = st.slider(
         "1 = Completely Artificial — 5 = Highly Authentic / Rings 100% True",
@@ -332,33 +285,101 @@ def render():
         key="improvement_suggestion",
     )
 
-    # ── AUTO-SAVE on every interaction ─────────────────────────────────────────
-    _save_answers(session_id, f1_inputs, f2_inputs, f3_inputs,
-                  case_label, navigator_name)
-    get_service_client().table("evaluation_sessions_v15").update({
-        "overall_field_authenticity": overall_score,
-        "authenticity_reasoning": authenticity_reasoning,
-        "improvement_suggestion": improvement_suggestion,
-    }).eq("id", session_id).execute()
+    # ── AUTO-SAVE (skipped when nothing changed since the last save) ─────────
+    answers_hash = hash(json.dumps(
+        [session_id, f1_inputs, f2_inputs, f3_inputs,
+         overall_score, authenticity_reasoning, improvement_suggestion],
+        sort_keys=True,
+    ))
+    if answers_hash != st.session_state.get("_last_saved_hash"):
+        _save_answers(session_id,
+                      _changed_rows(f1_inputs, f1_saved),
+                      _changed_rows(f2_inputs, f2_saved),
+                      _changed_rows(f3_inputs, f3_saved),
+                      overall_score, authenticity_reasoning, improvement_suggestion)
+        st.session_state["_last_saved_hash"] = answers_hash
+        st.session_state[saved_key] = (
+            {inp["event_index"]: inp for inp in f1_inputs},
+            {inp["triple_index"]: inp for inp in f2_inputs},
+            {inp["option_index"]: inp for inp in f3_inputs},
+            {
+                "overall_field_authenticity": overall_score,
+                "authenticity_reasoning": authenticity_reasoning,
+                "improvement_suggestion": improvement_suggestion,
+            },
+        )
 
     # ── SUBMIT ──────────────────────────────────────────────────────────────────
     st.divider()
 
     if st.button("Submit Evaluation", type="primary", use_container_width=True):
-        _save_answers(session_id, f1_inputs, f2_inputs, f3_inputs,
-                      case_label, navigator_name)
-
-        # Mark session completed with overall score
-        get_service_client().table("evaluation_sessions_v15").update({
-            "status": "completed",
-            "completed_at": datetime.now(timezone.utc).isoformat(),
-            "overall_field_authenticity": overall_score,
-            "authenticity_reasoning": authenticity_reasoning,
-            "improvement_suggestion": improvement_suggestion,
-        }).eq("id", session_id).execute()
+        # Answers were saved above; this only marks the session completed
+        _save_answers(session_id, [], [], [],
+                      overall_score, authenticity_reasoning, improvement_suggestion,
+                      finalize=True)
 
         st.success("Evaluation submitted successfully!")
+        st.session_state.pop("_last_saved_hash", None)
+        st.session_state.pop(saved_key, None)
         st.session_state.pop("current_session_id", None)
         st.session_state.pop("current_case_id", None)
         st.session_state["current_page"] = "pn_dashboard"
         st.rerun()
+
+
+def render():
+    session_id = st.session_state.get("current_session_id")
+    case_id = st.session_state.get("current_case_id")
+
+    if not session_id or not case_id:
+        st.error("No active evaluation session. Returning to dashboard.")
+        st.session_state["current_page"] = "pn_dashboard"
+        st.rerun()
+        return
+
+    saved_key = f"_saved_{session_id}"
+
+    # Navigation is deferred until after the evaluation block below has run,
+    # so its auto-save flushes the latest answers before leaving the page.
+    back_clicked = st.button("< Back to Dashboard")
+
+    # ── Fetch case data ──────────────────────────────────────────────────────
+    case = _load_case(case_id)
+
+    # ── Load any previously saved answers ─────────────────────────────────────
+    # Fetched once per session and then kept current by the auto-save below, so
+    # reruns don't re-query the database.
+    if saved_key not in st.session_state:
+        st.session_state[saved_key] = _load_saved_answers(session_id)
+
+    st.header("Case Narrative")
+    st.info(case["narrative_summary"])
+
+    # ── V7 CHECKLIST FIELDS ───────────────────────────────────────────────────
+    with st.expander("PN 3-Stage Lifecycle Checklist", expanded=False):
+        st.markdown(f"**Role Delineation Check:** {case.get('role_delineation_check', 'N/A')}")
+
+        st.subheader("Stage 1: Entry & Triage")
+        st.markdown(f"**Atlantis Entry Confirmed:** {'Yes' if case.get('atlantis_entry_confirmed') else 'No'}")
+        st.markdown(f"**Demographic Audit:** {case.get('demographic_audit_note', 'N/A')}")
+        st.markdown(f"**Home vs LTC Goal:** {case.get('home_vs_ltc_goal', 'N/A')}")
+
+        st.subheader("Stage 2: Maintenance")
+        st.markdown(f"**V-Card & Flyer Status:** {case.get('v_card_flyer_status', 'N/A')}")
+
+        st.subheader("Stage 3: Handoff")
+        st.markdown(f"**Pre-DC Pulse Call:** {case.get('pre_dc_pulse_call', 'N/A')}")
+        st.markdown(f"**Atlantis Final Sync:** {case.get('atlantis_final_sync', 'N/A')}")
+
+        st.markdown(f"**Case Outcome:** `{case.get('case_outcome', 'N/A')}`")
+
+    state_log = case["format_1_state_log"]
+    triples = case["format_2_triples"]
+    rl_scenario = case["format_3_rl_scenario"]
+
+    _render_evaluation(session_id, saved_key, state_log, triples, rl_scenario)
+
+    if back_clicked:
+        st.session_state.pop(saved_key, None)
+        st.session_state["current_page"] = "pn_dashboard"
+        st.rerun()
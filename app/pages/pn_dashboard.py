@@ -5,17 +5,36 @@ Shows In-Progress (Resume), Pending (Start), and Completed evaluations.
 """
 
 import re
+from operator import itemgetter
 import streamlit as st
-from app.supabase_client import get_authenticated_client
+from app.supabase_client import get_authenticated_client, get_service_client
 from app.auth import get_user_id
 
 
+_LABEL_RE = re.compile(r"(\d+)")
+
+
 def _label_sort_key(label: str) -> int:
     """Extract numeric part from label like 'Case_12' for proper ordering."""
-    m = re.search(r"(\d+)", label or "")
+    m = _LABEL_RE.search(label or "")
     return int(m.group(1)) if m else 0
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_all_cases():
+    """Fetch the case list shared by every navigator, sorted by label number.
+
+    Cached for 5 minutes, so the sort runs once per refresh rather than per rerun.
+    """
+    cases = (
+        get_service_client()
+        .table("synthetic_cases_v15")
+        .select("id, label, narrative_summary")
+        .execute()
+    ).data or []
+    return sorted(cases, key=lambda c: _label_sort_key(c.get("label", "")))
+
+
 def render():
     client = get_authenticated_client()
     user_id = get_user_id()
@@ -24,12 +43,8 @@ def render():
     st.title("Navigator Dashboard")
     st.write(f"Welcome, {navigator_name}")
 
-    # Fetch all cases and this navigator's sessions
-    all_cases = (
-        client.table("synthetic_cases_v15")
-        .select("id, label, narrative_summary")
-        .execute()
-    )
+    # Fetch all cases (cached) and this navigator's sessions
+    all_cases = _load_all_cases()
     my_sessions = (
         client.table("evaluation_sessions_v15")
         .select("id, case_id, case_label, status, created_at, completed_at")
@@ -37,18 +52,20 @@ def render():
         .execute()
     )
 
-    all_cases_sorted = sorted(all_cases.data or [], key=lambda c: _label_sort_key(c.get("label", "")))
-    cases_dict = {c["id"]: c for c in all_cases_sorted}
-    sessions_by_case = {s["case_id"]: s for s in (my_sessions.data or [])}
+    cases_dict = {c["id"]: c for c in all_cases}
+    sessions = my_sessions.data or []
+    sessions_by_case = {s["case_id"]: s for s in sessions}
+    for s in sessions:
+        s["_sort_key"] = _label_sort_key(s.get("case_label", ""))
 
-    pending_case_ids = [c["id"] for c in all_cases_sorted if c["id"] not in sessions_by_case]
+    pending_case_ids = [c["id"] for c in all_cases if c["id"] not in sessions_by_case]
     in_progress = sorted(
-        [s for s in (my_sessions.data or []) if s["status"] == "in_progress"],
-        key=lambda s: _label_sort_key(s.get("case_label", "")),
+        [s for s in sessions if s["status"] == "in_progress"],
+        key=itemgetter("_sort_key"),
     )
     completed = sorted(
-        [s for s in (my_sessions.data or []) if s["status"] == "completed"],
-        key=lambda s: _label_sort_key(s.get("case_label", "")),
+        [s for s in sessions if s["status"] == "completed"],
+        key=itemgetter("_sort_key"),
     )
 
     # ── In-Progress ──────────────────────────────────────────────────────────
@@ -66,7 +66,7 @@ def _build_case_index(f2_df: pd.DataFrame, f3_df: pd.DataFrame):
     return unique
 
 
-def _fetch_existing_feedback(navigator_id: str, case_id: str):
+def _fetch_existing_feedback(svc, navigator_id: str, case_id: str):
     """Fetch any previously saved RLHF feedback rows for this navigator + case.
 
     Uses the service client so reads never depend on the user's JWT freshness.
@@ -74,7 +74,6 @@ def _fetch_existing_feedback(navigator_id: str, case_id: str):
 
     Returns two dicts keyed by question/scenario index.
     """
-    svc = get_service_client()
     f2_resp = (
         svc.table("f2_rlhf_feedback")
         .select("*")
@@ -94,7 +93,7 @@ def _fetch_existing_feedback(navigator_id: str, case_id: str):
     return f2_by_idx, f3_by_idx
 
 
-def _fetch_navigator_progress(navigator_id: str):
+def _fetch_navigator_progress(svc, navigator_id: str):
     """Fetch all of a navigator's saved RLHF rows in two queries.
 
     Uses the service client so reads never depend on the user's JWT freshness.
@@ -102,7 +101,6 @@ def _fetch_navigator_progress(navigator_id: str):
 
     Returns two dicts: {case_id: count_of_saved_rows} for F2 and F3.
     """
-    svc = get_service_client()
     f2_counts = {}
     f3_counts = {}
 
@@ -149,13 +147,12 @@ def _progress_symbol(case_id, f2_saved, f3_saved, f2_expected, f3_expected) -> s
 
 # ── Save logic ───────────────────────────────────────────────────────────────
 
-def _save_f2_feedback(navigator_id, navigator_name, case_row, f2_inputs):
+def _save_f2_feedback(svc, navigator_id, navigator_name, case_row, f2_inputs):
     """Upsert Format 2 feedback rows to Supabase.
 
     Uses the service role client so saves don't depend on the user's auth
     token freshness — prevents work loss if the JWT has expired mid-session.
     """
-    svc = get_service_client()
     case_id = case_row["case_id"]
     batch_id = case_row.get("batch_id", "")
     case_label = case_row.get("case_label", "")
@@ -186,9 +183,8 @@ def _save_f2_feedback(navigator_id, navigator_name, case_row, f2_inputs):
     return len(f2_rows)
 
 
-def _save_f3_feedback(navigator_id, navigator_name, case_row, f3_inputs):
+def _save_f3_feedback(svc, navigator_id, navigator_name, case_row, f3_inputs):
     """Upsert Format 3 feedback rows to Supabase (service role client)."""
-    svc = get_service_client()
     case_id = case_row["case_id"]
     batch_id = case_row.get("batch_id", "")
     case_label = case_row.get("case_label", "")
@@ -355,6 +351,8 @@ def _render_f3_section(f3_rows: pd.DataFrame, prefilled: dict, case_id: str):
 # ── Main render ──────────────────────────────────────────────────────────────
 
 def render():
+    # One service client for the whole rerun, passed to the fetch/save helpers
+    svc = get_service_client()
     user_id = get_user_id()
     navigator_name = st.session_state.get("full_name", "Navigator")
 
@@ -378,7 +376,7 @@ def render():
         st.session_state["rlhf_case_idx"] = 0
 
     # ── Compute progress for this navigator ──────────────────────────────────
-    f2_saved_counts, f3_saved_counts = _fetch_navigator_progress(user_id)
+    f2_saved_counts, f3_saved_counts = _fetch_navigator_progress(svc, user_id)
     f2_expected_counts, f3_expected_counts = _compute_expected_counts(f2_df, f3_df)
 
     # ── Sidebar case selector ────────────────────────────────────────────────
@@ -420,7 +418,7 @@ def render():
         st.write(case_row.get("narrative_summary", ""))
 
     # ── Pull existing feedback for prefill ───────────────────────────────────
-    f2_prior, f3_prior = _fetch_existing_feedback(user_id, case_id)
+    f2_prior, f3_prior = _fetch_existing_feedback(svc, user_id, case_id)
 
     # ── Filter rows for this case ────────────────────────────────────────────
     f2_rows = (
@@ -440,7 +438,7 @@ def render():
     if len(f2_rows) > 0:
         if st.button("Save Format 2 Annotations", use_container_width=True, type="primary", key="save_f2_btn"):
             try:
-                _save_f2_feedback(user_id, navigator_name, case_row, f2_inputs)
+                _save_f2_feedback(svc, user_id, navigator_name, case_row, f2_inputs)
 
                 # Check if full case is now complete (F2 complete AND existing F3 already complete)
                 f2_answered = sum(
@@ -470,7 +468,7 @@ def render():
     if len(f3_rows) > 0:
         if st.button("Save Format 3 Annotations", use_container_width=True, type="primary", key="save_f3_btn"):
             try:
-                _save_f3_feedback(user_id, navigator_name, case_row, f3_inputs)
+                _save_f3_feedback(svc, user_id, navigator_name, case_row, f3_inputs)
 
                 # Check if full case is now complete (F3 complete AND existing F2 already complete)
                 f3_answered = sum(
@@ -3,15 +3,25 @@ Supabase client initialization with session restoration.
 
 Uses @st.cache_resource for a singleton client. Auth tokens are stored
 in st.session_state and restored on each rerun via get_authenticated_client().
+Each client runs on a cached keep-alive httpx pool so TLS handshakes are
+paid once per process, not once per request. run_parallel() runs
+independent page-load reads on one shared worker pool.
 """
 
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import streamlit as st
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 load_dotenv()
 
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+HTTP_TIMEOUT = 30.0
+
 
 def _get_secret(name: str) -> str:
     """Read from os.environ first, then fall back to st.secrets (Streamlit Cloud)."""
@@ -25,10 +35,25 @@ def _get_secret(name: str) -> str:
 
 
 @st.cache_resource
-def _init_client() -> Client:
+def _http_client(name: str) -> httpx.Client:
+    """Return a long-lived keep-alive connection pool for one Supabase client.
+
+    Each Supabase client gets its own pool: older postgrest-py versions write
+    the client's auth headers onto the httpx.Client they are given, so sharing
+    one between the anon and service-role clients could mix up their keys.
+    """
+    return httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, follow_redirects=True)
+
+
+def _create(key_name: str) -> Client:
     url = _get_secret("SUPABASE_URL")
-    key = _get_secret("SUPABASE_KEY")
-    return create_client(url, key)
+    key = _get_secret(key_name)
+    return create_client(url, key, options=ClientOptions(httpx_client=_http_client(key_name)))
+
+
+@st.cache_resource
+def _init_client() -> Client:
+    return _create("SUPABASE_KEY")
 
 
 def get_supabase_client() -> Client:
@@ -36,20 +61,93 @@ def get_supabase_client() -> Client:
     return _init_client()
 
 
+@st.cache_resource
+def _applied_session() -> dict:
+    """Tokens last passed to set_session on the shared client.
+
+    Cached alongside the client itself (not in st.session_state) because the
+    client is shared by every browser session in the process.
+    """
+    return {}
+
+
+def mark_session_applied(access_token: str = None, refresh_token: str = None):
+    """Record the tokens now set on the shared client (None after sign-out)."""
+    _applied_session()["tokens"] = (
+        (access_token, refresh_token) if access_token and refresh_token else None
+    )
+
+
 def get_authenticated_client() -> Client:
-    """Return a Supabase client with the current user's session restored."""
+    """Return a Supabase client with the current user's session restored.
+
+    set_session makes a network call, so it is skipped when the client
+    already holds this user's tokens.
+    """
     client = _init_client()
     if "access_token" in st.session_state and "refresh_token" in st.session_state:
-        client.auth.set_session(
-            st.session_state["access_token"],
-            st.session_state["refresh_token"],
-        )
+        tokens = (st.session_state["access_token"], st.session_state["refresh_token"])
+        if _applied_session().get("tokens") != tokens:
+            client.auth.set_session(*tokens)
+            mark_session_applied(*tokens)
     return client
 
 
 @st.cache_resource
 def get_service_client() -> Client:
     """Return a Supabase client using the service role key (bypasses RLS)."""
-    url = _get_secret("SUPABASE_URL")
-    key = _get_secret("SUPABASE_SERVICE_ROLE_KEY")
-    return create_client(url, key)
+    return _create("SUPABASE_SERVICE_ROLE_KEY")
+
+
+def reset_supabase_clients():
+    """Drop the cached Supabase clients and their connection pools.
+
+    Called after a stale-connection error so the next call builds fresh
+    clients, without st.cache_resource.clear() wiping unrelated resources.
+    Old pools are left for garbage collection rather than closed, since other
+    browser sessions may still be mid-request on them.
+    """
+    _init_client.clear()
+    get_service_client.clear()
+    _applied_session.clear()
+    _http_client.clear()
+
+
+def retry_stale(fn, get_client, retries=2):
+    """Call fn(client), retrying on stale connection errors with jittered backoff.
+
+    The client is looked up through get_client on every attempt, so a retry
+    runs on the fresh client built after reset_supabase_clients().
+    """
+    for attempt in range(retries):
+        try:
+            return fn(get_client())
+        except httpx.RemoteProtocolError:
+            if attempt == retries - 1:
+                raise
+            reset_supabase_clients()
+            time.sleep(random.uniform(0.1, 0.3 * 2 ** attempt))
+
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    """Shared worker pool for concurrent page-load reads."""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def run_parallel(get_client, *fns) -> list:
+    """Run independent Supabase reads fn(client) concurrently, retrying each like retry_stale.
+
+    get_client is only called on this (script) thread, since it may read
+    st.session_state; the workers just receive the client.
+    """
+    client = get_client()
+    futures = [_executor().submit(fn, client) for fn in fns]
+    results = []
+    for fn, future in zip(fns, futures):
+        try:
+            results.append(future.result())
+        except httpx.RemoteProtocolError:
+            reset_supabase_clients()
+            results.append(retry_stale(fn, get_client))
+    return results
@@ -1,20 +1,42 @@
-"""Generate 25 synthetic cases with randomized patients and frictions."""
-import json, os, random, time
+"""Generate 25 synthetic cases with randomized patients and frictions.
+
+Cases are generated concurrently; GEMINI_CONCURRENCY (default 5) caps how
+many Gemini calls are in flight at once and GEMINI_RPM (default 15) caps how
+many are started per minute. The system prompt and static prompt prefix are
+pinned with Gemini context caching when the model supports it.
+
+Set GENERATION_SEED to replay a previous run's patient/friction combos; the
+seed used is printed at startup.
+"""
+import asyncio, datetime, os, random, time
+from collections import deque
 from dotenv import load_dotenv
 load_dotenv()
 
 import google.generativeai as genai
+from google.generativeai import caching
+import orjson
 from generate_synthetic import (
-    load_taxonomy, retrieve_few_shot_examples, build_prompt,
-    SyntheticCaseOutput, MODEL_NAME, CHROMA_DB_PATH, COLLECTION_NAME,
-    TAXONOMIES_DIR,
+    load_taxonomy, retrieve_few_shot_examples_batch, build_static_prefix,
+    build_variable_suffix, prompt_json, extract_json_body, SyntheticCaseOutput,
+    MODEL_NAME, CHROMA_DB_PATH, COLLECTION_NAME, TAXONOMIES_DIR,
 )
+from prompts import SYSTEM_PROMPT
 import chromadb
 
 OUTPUT_DIR = "./data/synthetic_batch_25_v15"
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "5"))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+PROMPT_CACHE_TTL = datetime.timedelta(minutes=30)
+GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    temperature=0.8,
+)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-PATIENTS = [
+PATIENTS = (
     "88yo Male, Bilateral TKA",
     "78yo Female, CHF",
     "65yo Male, COPD exacerbation",
@@ -30,9 +52,9 @@ PATIENTS = [
     "79yo Male, Amputation rehab",
     "68yo Female, Multiple sclerosis flare",
     "82yo Male, Parkinson's with UTI",
-]
+)
 
-FRICTIONS = [
+FRICTIONS = (
     "Medicaid CHC Waiver",
     "Provider Illness",
     "Loss of Skilled Need",
@@ -54,23 +76,25 @@ FRICTIONS = [
     "Sentiment_Readiness_Gap",
     "Family_Training_Gap_Anxiety",
     "Liaison_Communication_Silo",
-]
+)
 
 # Patient-choice frictions (used to enforce ~30% patient/family-driven cases)
-PATIENT_CHOICE_FRICTIONS = [
+PATIENT_CHOICE_FRICTIONS = (
     "Caregiver_Panic",
     "Family Disagreement on Discharge Plan",
     "Caregiver Training Gap",
     "LTC_Pivot_Abort",
     "Family_Training_Gap_Anxiety",
-]
+)
 
 
-def _build_unique_combos(patients, frictions, n=25, patient_choice_frictions=None, patient_choice_slots=8):
+def _build_unique_combos(patients, frictions, n=25, patient_choice_frictions=None, patient_choice_slots=8,
+                         rng=random):
     """Build n unique (patient, friction) pairs with ~30% patient-choice enforcement.
 
     Reserves `patient_choice_slots` for patient/family-driven frictions,
     fills the rest with non-patient-choice frictions. No duplicate combos.
+    Pass a seeded `random.Random` as `rng` for a reproducible selection.
     """
     import itertools
 
@@ -83,224 +107,172 @@ def _build_unique_combos(patients, frictions, n=25, patient_choice_frictions=Non
 
     # Build patient-choice combos
     pc_combos = list(itertools.product(patients, pc_frictions))
-    random.shuffle(pc_combos)
+    rng.shuffle(pc_combos)
     pc_selected = pc_combos[:patient_choice_slots]
 
     # Build non-patient-choice combos
     non_pc_combos = list(itertools.product(patients, non_pc_frictions))
-    random.shuffle(non_pc_combos)
+    rng.shuffle(non_pc_combos)
     non_pc_selected = non_pc_combos[:(n - len(pc_selected))]
 
     combined = pc_selected + non_pc_selected
-    random.shuffle(combined)
+    rng.shuffle(combined)
     return combined[:n]
 
 
-def main():
-    api_key = os.environ.get("GEMINI_API_KEY")
-    genai.configure(api_key=api_key, transport="rest")
-    model = genai.GenerativeModel(
-        model_name=MODEL_NAME,
-        generation_config=genai.GenerationConfig(
-            response_mime_type="application/json",
-            temperature=0.8,
-        ),
-    )
+class _RateLimiter:
+    """Sliding-window limiter: at most max_calls acquisitions per period seconds."""
+
+    def __init__(self, max_calls, period=60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return self
+                await asyncio.sleep(self.period - (now - self._calls[0]))
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _backoff(attempt):
+    """Exponential backoff with jitter, capped at BACKOFF_CAP seconds."""
+    return min(BACKOFF_BASE * 2 ** attempt + random.uniform(0, 1), BACKOFF_CAP)
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _generate_streamed(model, user_prompt):
+    """Stream one generation and return the response body as bytes."""
+    buf = bytearray()
+    for chunk in model.generate_content(contents=[{"role": "user", "parts": [user_prompt]}], stream=True):
+        if chunk.parts:
+            buf += chunk.text.encode("utf-8")
+    return bytes(buf)
 
+
+def _retrieve_examples(combos):
+    """Few-shot examples for every (patient, friction) combo, from a single Chroma query."""
     client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
     collection = client.get_or_create_collection(name=COLLECTION_NAME)
+    query_texts = [f"Bureaucratic delay with {friction} and clinical barriers" for _, friction in combos]
+    return retrieve_few_shot_examples_batch(collection, complexity_gte=4, query_texts=query_texts, n=2)
 
-    friction_taxonomy = load_taxonomy("friction_taxonomy.json")
-    action_taxonomy = load_taxonomy("action_taxonomy.json")
-    outcome_taxonomy = load_taxonomy("outcome_taxonomy.json")
-
-    system_prompt = (
-        "=== ROLE ===\n\n"
-
-        "You are a Patient Navigator (PN) and a master of professional communication. "
-        "You work for Healing Partners. Your role is to bridge the gap between the facility "
-        "and the home by documenting data in Atlantis and supporting families through the "
-        "transition process.\n\n"
-
-        "=== WHAT ATLANTIS IS ===\n\n"
-
-        "Atlantis is the PN's personal documentation tool. The PN writes their own notes here: "
-        "visit logs, demographic corrections, sentiment observations, V-Card confirmations, "
-        "discharge dates (once told by the SW), and MA scheduling details.\n\n"
-
-        "=== WHAT ATLANTIS IS NOT ===\n\n"
-
-        "Atlantis does NOT show: Social Worker notes, HHA referral statuses, agency acceptance "
-        "updates, medication lists, clinical documentation, discharge plans, pending statuses, "
-        "or any live feed from other providers. The PN cannot 'check Atlantis' for information "
-        "they did not enter themselves. Atlantis is not a shared communication portal between "
-        "the PN, SW, and HHA. The SW cannot see what the PN writes in Atlantis. Documenting "
-        "something in Atlantis does NOT notify the SW.\n\n"
-
-        "=== HOW THE PN GETS UPDATES ===\n\n"
-
-        "The PN learns new information through exactly three channels:\n"
-        "1. The SW calls, texts, or emails the PN with an update.\n"
-        "2. The family tells the PN during a visit or phone call.\n"
-        "3. The PN asks the SW directly for a verbal status update.\n\n"
-
-        "If none of these have happened, the PN does NOT have the information. "
-        "The PN documents what they were told, by whom, and when — in Atlantis. "
-        "To communicate something to the SW, the PN calls, texts, or emails the SW directly. "
-        "Writing it in Atlantis is for the PN's own records only.\n\n"
-
-        "=== WHAT THE PN EDUCATES ON ===\n\n"
-
-        "The PN educates the family on exactly three things:\n"
-        "1. The Healing Partners program — what the service is and how it works.\n"
-        "2. The MA visit — who the Medical Assistant is, what they do on Day 1, "
-        "and the 24-hour post-discharge window.\n"
-        "3. The V-Card — so the family recognizes the Healing Partners caller ID.\n\n"
-
-        "=== WHAT THE PN DEFERS ===\n\n"
-
-        "If the family asks about HHA nurse schedules, medication management, wound care "
-        "protocols, clinical dressings, or equipment operation, the PN says: 'That's a great "
-        "question for the Social Worker and the clinical team' and documents the question in "
-        "Atlantis for their own records.\n\n"
-
-        "If the family has anxiety, training concerns, or conflicts about the discharge plan, "
-        "the PN refers them to speak with the Social Worker directly. The PN does not relay "
-        "family concerns to the SW on the family's behalf — the family communicates directly "
-        "with the SW for clinical or discharge issues.\n\n"
-
-        "=== OPERATIONAL GUARDRAILS ===\n\n"
-
-        "The No-Vendor Rule: The PN never calls HHAs, DME vendors, or transport companies. "
-        "The PN only communicates with the Family and the Social Worker.\n\n"
-
-        "The Wait Default: If the SW has not provided an update, the PN documents the "
-        "communication gap in Atlantis and waits. The PN does not seek the information from "
-        "other sources.\n\n"
-
-        "The HHA-First Rule: The PN does not discuss specific MA visit times or schedule "
-        "the MA until the SW verbally confirms the HHA is accepted and in place.\n\n"
-
-        "The Discharge Ownership Rule: The SW owns the discharge process. The PN does not "
-        "drive the discharge timeline, negotiate discharge dates, or initiate discharge planning. "
-        "The PN does not know about or get involved in HHA orders, medication lists, or clinical "
-        "documentation flowing between the facility and the HHA. The PN waits for the SW to "
-        "communicate the discharge date and plan, then acts within their lane.\n\n"
-
-        "The PN Endpoint: The PN's role ends when the patient is discharged and the MA first "
-        "visit is scheduled within 24 hours. After this point, the case transitions to the MA "
-        "and Healing Partners care management. The PN does not follow up post-discharge or "
-        "address issues that arise after the patient leaves the facility. After discharge, the "
-        "family contacts the HHA or the SW with any issues — not the PN. If the family calls "
-        "the PN post-discharge, the PN directs them to the appropriate contact and does not "
-        "attempt to resolve the issue.\n\n"
-
-        "=== BANNED ACTIONS (AUTOMATIC OVERSTEP) ===\n\n"
-
-        "- Calling HHA intake, DME vendors, or transport companies\n"
-        "- Suggesting specific HHA agencies to the Social Worker\n"
-        "- Handling Face-to-Face (F2F) forms\n"
-        "- Managing or reviewing facility medications\n"
-        "- Touching the facility EMR or clinical documentation\n"
-        "- Calling insurance companies for authorization\n"
-        "- Educating families on HHA nurse roles, wound care, or medication schedules\n"
-        "- Checking Atlantis for information the PN did not enter\n"
-        "- Reading or referencing SW notes, HHA statuses, or referral details in Atlantis\n"
-        "- Scheduling the MA before the SW verbally confirms the HHA is accepted\n"
-        "- Leading or calling facility team meetings\n"
-        "- Telling families to refuse discharge or go AMA\n"
-        "- Assessing or scoring family readiness levels (this is the SW's role)\n"
-        "- Requesting the SW schedule training sessions, care conferences, or family meetings on the PN's behalf\n"
-        "- Relaying family concerns to the SW — the family speaks to the SW directly\n"
-        "- Flagging missing HHA orders or clinical documentation (the PN does not know about these)\n"
-        "- Any involvement after the patient is discharged and the MA visit is scheduled\n\n"
-
-        "=== THE PROSE-ONLY MANDATE ===\n\n"
-
-        "NO UNDERSCORES: Under no circumstances should taxonomy keys with underscores "
-        "appear in the narrative_summary, action_taken, description, or any other text field. "
-        "These keys are for internal logic ONLY.\n\n"
-
-        "NATURAL INTEGRATION: Translate every taxonomy concept into a professional sentence.\n"
-        "INCORRECT: 'The PN will Verify_Sentiment_Score and document it.'\n"
-        "CORRECT: 'The Navigator asked the daughter how she felt about managing care at home "
-        "and documented her anxiety in Atlantis.'\n\n"
-
-        "CONTEXTUAL VARIATION: Use synonyms and varied phrasing. Instead of always saying "
-        "'flagged,' say 'alerted the Social Worker,' 'noted the concern for the clinical team,' "
-        "or 'documented the gap in Atlantis for the SW.'\n\n"
-
-        "=== STORYTELLING RULES ===\n\n"
-
-        "NARRATIVE SUMMARY: Write a 3rd-person story (1 paragraph, 3-5 sentences) centered on "
-        "the PATIENT'S experience. Start with the patient's name and clinical situation, describe "
-        "the friction or barrier they faced, and conclude with how the PN acted as a supportive "
-        "liaison. Do NOT write a list of PN tasks.\n\n"
-
-        "FORMAT 1 EVENT DESCRIPTIONS: Each event_description must flow like a real-time progress "
-        "note where the PN's information comes from the SW or the family — never from reading "
-        "a system.\n"
-        "Example: 'The Social Worker called to confirm that the agency had accepted the referral "
-        "and assigned a nurse for Monday morning; the Navigator documented this update in Atlantis "
-        "and began preparing the family for the first-day transition.'\n\n"
-
-        "FOG OF WAR: The PN always acts on INCOMPLETE information. At least one critical "
-        "detail must be unknown, delayed, or contradictory.\n\n"
-
-        "PATIENT CHOICE: Some cases must feature friction driven by patient or family decisions.\n\n"
-
-        "BANNED TROPES: 'F2F / Face-to-Face signatures', 'burned-out Social Worker', "
-        "'100-day financial cliff', 'Private pay to LTC', 'Black Hole'."
-    )
 
-    # Build 25 unique (patient, friction) combos — 8 patient-choice, 17 other
-    combos = _build_unique_combos(PATIENTS, FRICTIONS, n=25,
-                                  patient_choice_frictions=PATIENT_CHOICE_FRICTIONS,
-                                  patient_choice_slots=8)
-    print(f"Generated {len(combos)} unique patient-friction combinations.\n")
+def _create_prompt_cache(static_prefix):
+    """Pin the system prompt and static prefix server-side; None if caching is unavailable."""
+    try:
+        return caching.CachedContent.create(
+            model=MODEL_NAME,
+            system_instruction=SYSTEM_PROMPT,
+            contents=[{"role": "user", "parts": [static_prefix]}],
+            ttl=PROMPT_CACHE_TTL,
+        )
+    except Exception as e:
+        print(f"Context caching unavailable, sending full prompts: {str(e)[:200]}")
+        return None
+
 
-    successes = 0
-    failures = 0
+async def _generate_case(i, patient, friction, examples, sem, limiter, model, prompt_prefix):
+    """Generate, validate and save one case. Returns True on success.
 
-    for i, (patient, friction) in enumerate(combos):
+    prompt_prefix is prepended to the per-case suffix; it is empty when the
+    static prompt already lives in the model's cached content.
+    """
+    async with sem:
         print(f"\n--- Case {i+1}/25 --- Patient: {patient} | Friction: {friction}")
 
-        query_text = f"Bureaucratic delay with {friction} and clinical barriers"
-        examples = retrieve_few_shot_examples(collection, complexity_gte=4, query_text=query_text, n=2)
-        user_prompt = build_prompt(friction_taxonomy, action_taxonomy, outcome_taxonomy, examples, patient, friction)
+        user_prompt = prompt_prefix + build_variable_suffix(examples, patient, friction)
 
         for attempt in range(3):
             try:
-                response = model.generate_content(
-                    contents=[{"role": "user", "parts": [system_prompt + "\n\n" + user_prompt]}]
-                )
-                raw = response.text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-                data = json.loads(raw)
-                validated = SyntheticCaseOutput.model_validate(data)
+                # The REST transport has no async client, so run the blocking
+                # call on a worker thread; the semaphore bounds concurrency.
+                async with limiter:
+                    raw = await asyncio.to_thread(_generate_streamed, model, user_prompt)
+                validated = SyntheticCaseOutput.model_validate_json(extract_json_body(raw))
 
                 out_path = os.path.join(OUTPUT_DIR, f"case_{i+1:02d}.json")
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(validated.model_dump(), f, indent=2)
+                payload = orjson.dumps(validated.model_dump(), option=orjson.OPT_INDENT_2)
+                await asyncio.to_thread(_write_bytes, out_path, payload)
 
-                print(f"  OK -> {out_path}")
-                successes += 1
-                break
+                print(f"  [{i+1:02d}] OK -> {out_path}")
+                return True
             except Exception as e:
                 err = str(e)
                 if "429" in err or "rate" in err.lower():
-                    wait = 60 * (attempt + 1)
-                    print(f"  Rate limited. Waiting {wait}s...")
-                    time.sleep(wait)
+                    print(f"  [{i+1:02d}] Rate limited (attempt {attempt+1}).")
                 else:
-                    print(f"  ERROR (attempt {attempt+1}): {err[:200]}")
-                    if attempt == 2:
-                        failures += 1
-                    else:
-                        time.sleep(5)
+                    print(f"  [{i+1:02d}] ERROR (attempt {attempt+1}): {err[:200]}")
+                if attempt < 2:
+                    await asyncio.sleep(_backoff(attempt))
+        return False
+
 
-        time.sleep(2)  # small delay between calls
+async def main():
+    api_key = os.environ.get("GEMINI_API_KEY")
+    genai.configure(api_key=api_key, transport="rest")
+
+    friction_str = prompt_json(load_taxonomy("friction_taxonomy.json"))
+    action_str = prompt_json(load_taxonomy("action_taxonomy.json"))
+    outcome_str = prompt_json(load_taxonomy("outcome_taxonomy.json"))
+    static_prefix = build_static_prefix(friction_str, action_str, outcome_str)
+
+    # Build 25 unique (patient, friction) combos — 8 patient-choice, 17 other
+    seed = int(os.getenv("GENERATION_SEED") or random.randrange(2**32))
+    combos = _build_unique_combos(PATIENTS, FRICTIONS, n=25,
+                                  patient_choice_frictions=PATIENT_CHOICE_FRICTIONS,
+                                  patient_choice_slots=8, rng=random.Random(seed))
+    print(f"Generated {len(combos)} unique patient-friction combinations (GENERATION_SEED={seed}).\n")
+
+    # Chroma retrieval (local embedding + search) and cache creation (a Gemini
+    # round-trip) are independent, so run them side by side on worker threads.
+    # return_exceptions lets a failed retrieval still hand back the cache, so
+    # it can be deleted below instead of lingering until its TTL.
+    examples_per_case, cached = await asyncio.gather(
+        asyncio.to_thread(_retrieve_examples, combos),
+        asyncio.to_thread(_create_prompt_cache, static_prefix),
+        return_exceptions=True,
+    )
+    if isinstance(cached, BaseException):
+        raise cached  # nothing was cached, so nothing to clean up
+    try:
+        if isinstance(examples_per_case, BaseException):
+            raise examples_per_case
+
+        if cached is not None:
+            model = genai.GenerativeModel.from_cached_content(cached, generation_config=GENERATION_CONFIG)
+            prompt_prefix = ""
+        else:
+            model = genai.GenerativeModel(model_name=MODEL_NAME, generation_config=GENERATION_CONFIG)
+            prompt_prefix = SYSTEM_PROMPT + "\n\n" + static_prefix + "\n\n"
+
+        sem = asyncio.Semaphore(GEMINI_CONCURRENCY)
+        limiter = _RateLimiter(GEMINI_RPM)
+        results = await asyncio.gather(*(
+            _generate_case(i, patient, friction, examples, sem, limiter, model, prompt_prefix)
+            for i, ((patient, friction), examples) in enumerate(zip(combos, examples_per_case))
+        ), return_exceptions=True)
+    finally:
+        if cached is not None:
+            cached.delete()
+
+    successes = sum(1 for r in results if r is True)
+    failures = len(results) - successes
 
     print(f"\nDone. Successes: {successes}, Failures: {failures}")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -17,11 +17,14 @@ import chromadb
 from dotenv import load_dotenv
 import google.generativeai as genai
 import json
+import orjson
 import os
+import re
 from datetime import datetime
 
 load_dotenv()
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+from prompts import SYSTEM_PROMPT
 from typing import List, Literal, Optional
 
 
@@ -73,6 +76,15 @@ class SyntheticCaseOutput(BaseModel):
     ]
 
 
+def prompt_json(obj) -> str:
+    """Compact JSON for prompt text: only the model reads it, so indentation is wasted tokens."""
+    return orjson.dumps(obj).decode("utf-8")
+
+
+# Schema text is identical for every prompt; build it once at import time.
+SCHEMA_STR = prompt_json(SyntheticCaseOutput.model_json_schema())
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def load_taxonomy(filename: str) -> dict:
@@ -81,16 +93,15 @@ def load_taxonomy(filename: str) -> dict:
         return json.load(f)
 
 
-def retrieve_few_shot_examples(collection, complexity_gte: int, query_text: str, n: int) -> list:
-    """Query ChromaDB for n seed cases filtered by minimum complexity."""
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=n,
-        where={"complexity_score": {"$gte": complexity_gte}},
-    )
+# Few-shot results keyed on (collection name, complexity_gte, query_text, n).
+# Batch runs reuse a handful of query texts, so each is embedded and queried once.
+_FEW_SHOT_CACHE: dict = {}
 
+
+def _parse_examples(metadatas: list) -> list:
+    """Decode the raw_json seed cases stored in a list of Chroma metadatas."""
     examples = []
-    for metadata in results.get("metadatas", [[]])[0]:
+    for metadata in metadatas:
         raw = metadata.get("raw_json", "")
         if raw:
             try:
@@ -100,17 +111,39 @@ def retrieve_few_shot_examples(collection, complexity_gte: int, query_text: str,
     return examples
 
 
-def build_prompt(friction_taxonomy: dict, action_taxonomy: dict, outcome_taxonomy: dict,
-                 few_shot_examples: list, target_patient: str, target_friction: str) -> str:
-    """Assemble the full LLM prompt following the spec in Section 2.2."""
+def retrieve_few_shot_examples(collection, complexity_gte: int, query_text: str, n: int) -> list:
+    """Query ChromaDB for n seed cases filtered by minimum complexity (memoized per process)."""
+    return retrieve_few_shot_examples_batch(collection, complexity_gte, [query_text], n)[0]
+
+
+def retrieve_few_shot_examples_batch(collection, complexity_gte: int, query_texts: list, n: int) -> list:
+    """Like retrieve_few_shot_examples, for many query texts in one Chroma call.
+
+    Returns one examples list per query text, in order. Texts already in the
+    cache are not sent to Chroma, and repeated texts are sent once.
+    """
+    keys = [(collection.name, complexity_gte, q, n) for q in query_texts]
+    # dict.fromkeys dedupes while keeping order; a batch of 25 cases has at most one text per friction
+    missing = list(dict.fromkeys(q for q, key in zip(query_texts, keys) if key not in _FEW_SHOT_CACHE))
+
+    if missing:
+        results = collection.query(
+            query_texts=missing,
+            n_results=n,
+            where={"complexity_score": {"$gte": complexity_gte}},
+        )
+        for q, metadatas in zip(missing, results.get("metadatas") or [[]] * len(missing)):
+            _FEW_SHOT_CACHE[(collection.name, complexity_gte, q, n)] = _parse_examples(metadatas)
+
+    return [_FEW_SHOT_CACHE[key] for key in keys]
 
-    friction_str  = json.dumps(friction_taxonomy, indent=2)
-    action_str    = json.dumps(action_taxonomy, indent=2)
-    outcome_str   = json.dumps(outcome_taxonomy, indent=2)
-    examples_str  = json.dumps(few_shot_examples, indent=2)
 
-    # Build JSON schema from Pydantic model for explicit instruction
-    schema_str = json.dumps(SyntheticCaseOutput.model_json_schema(), indent=2)
+def build_static_prefix(friction_str: str, action_str: str, outcome_str: str) -> str:
+    """The part of the prompt shared by every case: taxonomies, schema and rules.
+
+    Taxonomies are passed pre-serialized so callers building many prompts
+    serialize them once.
+    """
 
     prompt = f"""
 === STATIC TAXONOMIES ===
@@ -124,23 +157,11 @@ def build_prompt(friction_taxonomy: dict, action_taxonomy: dict, outcome_taxonom
 --- Outcome Taxonomy (defines state transition triggers) ---
 {outcome_str}
 
-=== FEW-SHOT REFERENCE CASES ===
-
-Here are {len(few_shot_examples)} real-world seed cases. Mimic their level of
-clinical detail, operational chaos, and formatting exactly:
-
-{examples_str}
-
-=== TASK ===
-
-Generate 1 NEW synthetic patient case with the following target variables:
-
-- Patient: {target_patient}
-- Main Friction: {target_friction}
+=== OUTPUT SCHEMA ===
 
 You MUST strictly output valid JSON conforming to this schema and NO other text:
 
-{schema_str}
+{SCHEMA_STR}
 
 === FIELD RULES ===
 
@@ -192,29 +213,67 @@ Rules for case_outcome:
     return prompt.strip()
 
 
-def validate_and_save(raw_text: str, run_index: int) -> Optional[SyntheticCaseOutput]:
-    """Parse raw LLM JSON response, validate with Pydantic, and persist to disk."""
-    # Strip any accidental markdown fences
-    cleaned = raw_text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+def build_variable_suffix(few_shot_examples: list, target_patient: str, target_friction: str) -> str:
+    """The per-case part of the prompt: few-shot examples and target variables."""
 
-    try:
-        data = json.loads(cleaned)
-    except json.JSONDecodeError as e:
-        print(f"  [ERROR] JSON parse failed: {e}")
-        return None
+    examples_str  = prompt_json(few_shot_examples)
+
+    prompt = f"""
+=== FEW-SHOT REFERENCE CASES ===
+
+Here are {len(few_shot_examples)} real-world seed cases. Mimic their level of
+clinical detail, operational chaos, and formatting exactly:
+
+{examples_str}
+
+=== TASK ===
+
+Generate 1 NEW synthetic patient case with the following target variables:
+
+- Patient: {target_patient}
+- Main Friction: {target_friction}
+
+Follow the OUTPUT SCHEMA and every rule above. Output ONLY the JSON object.
+"""
+    return prompt.strip()
+
+
+def build_prompt(friction_str: str, action_str: str, outcome_str: str,
+                 few_shot_examples: list, target_patient: str, target_friction: str) -> str:
+    """Assemble the full LLM prompt following the spec in Section 2.2."""
+    return (build_static_prefix(friction_str, action_str, outcome_str) + "\n\n"
+            + build_variable_suffix(few_shot_examples, target_patient, target_friction))
 
+
+_JSON_FENCE = re.compile(rb"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+def extract_json_body(raw: bytes) -> bytes:
+    """Return the JSON object in an LLM response, tolerating markdown fences or chatter."""
+    # Fast path: response_mime_type="application/json" normally yields bare JSON
+    if raw[:1] == b"{":
+        return raw
+    fenced = _JSON_FENCE.search(raw)
+    if fenced:
+        return fenced.group(1)
+    return raw[raw.find(b"{"):raw.rfind(b"}") + 1]
+
+
+def validate_and_save(raw_text: str, run_index: int) -> Optional[SyntheticCaseOutput]:
+    """Parse raw LLM JSON response, validate with Pydantic, and persist to disk."""
+    # Single pass: pydantic parses and validates the JSON without an intermediate dict
     try:
-        validated = SyntheticCaseOutput.model_validate(data)
-    except Exception as e:
-        print(f"  [ERROR] Pydantic validation failed: {e}")
+        validated = SyntheticCaseOutput.model_validate_json(extract_json_body(raw_text.encode("utf-8")))
+    except ValidationError as e:
+        print(f"  [ERROR] JSON parse/validation failed: {e}")
         return None
 
     # Save to ./data/synthetic_output/
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     out_path = os.path.join(OUTPUT_DIR, f"synthetic_case_{timestamp}_{run_index}.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(validated.model_dump(), f, indent=2)
+    with open(out_path, "wb") as f:
+        f.write(orjson.dumps(validated.model_dump(), option=orjson.OPT_INDENT_2))
 
     print(f"  Saved → {out_path}")
     return validated
@@ -244,149 +303,10 @@ def main():
     client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
     collection = client.get_or_create_collection(name=COLLECTION_NAME)
 
-    # Load static taxonomies
-    friction_taxonomy = load_taxonomy("friction_taxonomy.json")
-    action_taxonomy   = load_taxonomy("action_taxonomy.json")
-    outcome_taxonomy  = load_taxonomy("outcome_taxonomy.json")
-
-    system_prompt = (
-        "=== ROLE ===\n\n"
-
-        "You are a Patient Navigator (PN) and a master of professional communication. "
-        "You work for Healing Partners. Your role is to bridge the gap between the facility "
-        "and the home by documenting data in Atlantis and supporting families through the "
-        "transition process.\n\n"
-
-        "=== WHAT ATLANTIS IS ===\n\n"
-
-        "Atlantis is the PN's personal documentation tool. The PN writes their own notes here: "
-        "visit logs, demographic corrections, sentiment observations, V-Card confirmations, "
-        "discharge dates (once told by the SW), and MA scheduling details.\n\n"
-
-        "=== WHAT ATLANTIS IS NOT ===\n\n"
-
-        "Atlantis does NOT show: Social Worker notes, HHA referral statuses, agency acceptance "
-        "updates, medication lists, clinical documentation, discharge plans, pending statuses, "
-        "or any live feed from other providers. The PN cannot 'check Atlantis' for information "
-        "they did not enter themselves. Atlantis is not a shared communication portal between "
-        "the PN, SW, and HHA. The SW cannot see what the PN writes in Atlantis. Documenting "
-        "something in Atlantis does NOT notify the SW.\n\n"
-
-        "=== HOW THE PN GETS UPDATES ===\n\n"
-
-        "The PN learns new information through exactly three channels:\n"
-        "1. The SW calls, texts, or emails the PN with an update.\n"
-        "2. The family tells the PN during a visit or phone call.\n"
-        "3. The PN asks the SW directly for a verbal status update.\n\n"
-
-        "If none of these have happened, the PN does NOT have the information. "
-        "The PN documents what they were told, by whom, and when — in Atlantis. "
-        "To communicate something to the SW, the PN calls, texts, or emails the SW directly. "
-        "Writing it in Atlantis is for the PN's own records only.\n\n"
-
-        "=== WHAT THE PN EDUCATES ON ===\n\n"
-
-        "The PN educates the family on exactly three things:\n"
-        "1. The Healing Partners program — what the service is and how it works.\n"
-        "2. The MA visit — who the Medical Assistant is, what they do on Day 1, "
-        "and the 24-hour post-discharge window.\n"
-        "3. The V-Card — so the family recognizes the Healing Partners caller ID.\n\n"
-
-        "=== WHAT THE PN DEFERS ===\n\n"
-
-        "If the family asks about HHA nurse schedules, medication management, wound care "
-        "protocols, clinical dressings, or equipment operation, the PN says: 'That's a great "
-        "question for the Social Worker and the clinical team' and documents the question in "
-        "Atlantis for their own records.\n\n"
-
-        "If the family has anxiety, training concerns, or conflicts about the discharge plan, "
-        "the PN refers them to speak with the Social Worker directly. The PN does not relay "
-        "family concerns to the SW on the family's behalf — the family communicates directly "
-        "with the SW for clinical or discharge issues.\n\n"
-
-        "=== OPERATIONAL GUARDRAILS ===\n\n"
-
-        "The No-Vendor Rule: The PN never calls HHAs, DME vendors, or transport companies. "
-        "The PN only communicates with the Family and the Social Worker.\n\n"
-
-        "The Wait Default: If the SW has not provided an update, the PN documents the "
-        "communication gap in Atlantis and waits. The PN does not seek the information from "
-        "other sources.\n\n"
-
-        "The HHA-First Rule: The PN does not discuss specific MA visit times or schedule "
-        "the MA until the SW verbally confirms the HHA is accepted and in place.\n\n"
-
-        "The Discharge Ownership Rule: The SW owns the discharge process. The PN does not "
-        "drive the discharge timeline, negotiate discharge dates, or initiate discharge planning. "
-        "The PN does not know about or get involved in HHA orders, medication lists, or clinical "
-        "documentation flowing between the facility and the HHA. The PN waits for the SW to "
-        "communicate the discharge date and plan, then acts within their lane.\n\n"
-
-        "The PN Endpoint: The PN's role ends when the patient is discharged and the MA first "
-        "visit is scheduled within 24 hours. After this point, the case transitions to the MA "
-        "and Healing Partners care management. The PN does not follow up post-discharge or "
-        "address issues that arise after the patient leaves the facility. After discharge, the "
-        "family contacts the HHA or the SW with any issues — not the PN. If the family calls "
-        "the PN post-discharge, the PN directs them to the appropriate contact and does not "
-        "attempt to resolve the issue.\n\n"
-
-        "=== BANNED ACTIONS (AUTOMATIC OVERSTEP) ===\n\n"
-
-        "- Calling HHA intake, DME vendors, or transport companies\n"
-        "- Suggesting specific HHA agencies to the Social Worker\n"
-        "- Handling Face-to-Face (F2F) forms\n"
-        "- Managing or reviewing facility medications\n"
-        "- Touching the facility EMR or clinical documentation\n"
-        "- Calling insurance companies for authorization\n"
-        "- Educating families on HHA nurse roles, wound care, or medication schedules\n"
-        "- Checking Atlantis for information the PN did not enter\n"
-        "- Reading or referencing SW notes, HHA statuses, or referral details in Atlantis\n"
-        "- Scheduling the MA before the SW verbally confirms the HHA is accepted\n"
-        "- Leading or calling facility team meetings\n"
-        "- Telling families to refuse discharge or go AMA\n"
-        "- Assessing or scoring family readiness levels (this is the SW's role)\n"
-        "- Requesting the SW schedule training sessions, care conferences, or family meetings on the PN's behalf\n"
-        "- Relaying family concerns to the SW — the family speaks to the SW directly\n"
-        "- Flagging missing HHA orders or clinical documentation (the PN does not know about these)\n"
-        "- Any involvement after the patient is discharged and the MA visit is scheduled\n\n"
-
-        "=== THE PROSE-ONLY MANDATE ===\n\n"
-
-        "NO UNDERSCORES: Under no circumstances should taxonomy keys with underscores "
-        "appear in the narrative_summary, action_taken, description, or any other text field. "
-        "These keys are for internal logic ONLY.\n\n"
-
-        "NATURAL INTEGRATION: Translate every taxonomy concept into a professional sentence.\n"
-        "INCORRECT: 'The PN will Verify_Sentiment_Score and document it.'\n"
-        "CORRECT: 'The Navigator asked the daughter how she felt about managing care at home "
-        "and documented her anxiety in Atlantis.'\n\n"
-
-        "CONTEXTUAL VARIATION: Use synonyms and varied phrasing. Instead of always saying "
-        "'flagged,' say 'alerted the Social Worker,' 'noted the concern for the clinical team,' "
-        "or 'documented the gap in Atlantis for the SW.'\n\n"
-
-        "=== STORYTELLING RULES ===\n\n"
-
-        "NARRATIVE SUMMARY: Write a 3rd-person story (1 paragraph, 3-5 sentences) centered on "
-        "the PATIENT'S experience. Start with the patient's name and clinical situation, describe "
-        "the friction or barrier they faced, and conclude with how the PN acted as a supportive "
-        "liaison. Do NOT write a list of PN tasks.\n\n"
-
-        "FORMAT 1 EVENT DESCRIPTIONS: Each event_description must flow like a real-time progress "
-        "note where the PN's information comes from the SW or the family — never from reading "
-        "a system.\n"
-        "Example: 'The Social Worker called to confirm that the agency had accepted the referral "
-        "and assigned a nurse for Monday morning; the Navigator documented this update in Atlantis "
-        "and began preparing the family for the first-day transition.'\n\n"
-
-        "FOG OF WAR: The PN always acts on INCOMPLETE information. At least one critical "
-        "detail must be unknown, delayed, or contradictory.\n\n"
-
-        "PATIENT CHOICE: Some cases must feature friction driven by patient or family decisions.\n\n"
-
-        "BANNED TROPES: 'F2F / Face-to-Face signatures', 'burned-out Social Worker', "
-        "'100-day financial cliff', 'Private pay to LTC', 'Black Hole'."
-    )
+    # Load static taxonomies, serialized once for every prompt in the batch
+    friction_str = prompt_json(load_taxonomy("friction_taxonomy.json"))
+    action_str   = prompt_json(load_taxonomy("action_taxonomy.json"))
+    outcome_str  = prompt_json(load_taxonomy("outcome_taxonomy.json"))
 
     print(f"Starting batch generation: {BATCH_SIZE} case(s)")
     print(f"  Model          : {MODEL_NAME}")
@@ -409,14 +329,14 @@ def main():
 
         # 2.2 Build prompt
         user_prompt = build_prompt(
-            friction_taxonomy, action_taxonomy, outcome_taxonomy,
+            friction_str, action_str, outcome_str,
             examples, TARGET_PATIENT_DESC, TARGET_FRICTION,
         )
 
         # Call Gemini
         response = model.generate_content(
             contents=[
-                {"role": "user", "parts": [system_prompt + "\n\n" + user_prompt]}
+                {"role": "user", "parts": [SYSTEM_PROMPT + "\n\n" + user_prompt]}
             ]
         )
 
@@ -10,43 +10,54 @@ Usage:
 """
 
 import chromadb
-import json
+import orjson
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 
 SEED_CASES_DIR = "./data/seed_cases"
 CHROMA_DB_PATH = "./chroma_db"
 COLLECTION_NAME = "seed_cases"
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "500"))
+INGEST_WORKERS = 8
 
 
-def build_document_string(data: dict) -> str:
+def build_document_and_metadata(data: dict, raw_json: str) -> tuple:
     """
-    Concatenates the narrative/logical elements into a single searchable string
-    for semantic embedding. Targets: clinical_barriers, physical_barriers,
-    reasoning_trace_triples, and unscripted_chaos_signals.
+    Builds both outputs for one seed case in a single pass over its sections.
+
+    The document string concatenates the narrative/logical elements into a
+    single searchable string for semantic embedding. Targets: clinical_barriers,
+    physical_barriers, reasoning_trace_triples, and unscripted_chaos_signals.
+
+    The metadata dict only holds str, int, or float (a ChromaDB requirement) and
+    includes the raw_json payload so the LLM can receive the full case in Phase 2.
     """
+    header = data.get("case_header") or {}
+    clinical = data.get("clinical_logic") or {}
+    env = data.get("environmental_logic") or {}
+
+    # ── Document string ──
     parts = []
 
     # Clinical barriers
-    clinical_barriers = data.get("clinical_logic", {}).get("clinical_barriers", [])
+    clinical_barriers = clinical.get("clinical_barriers", [])
     if isinstance(clinical_barriers, list):
         parts.append("Clinical Barriers: " + "; ".join(clinical_barriers))
     elif isinstance(clinical_barriers, str):
         parts.append("Clinical Barriers: " + clinical_barriers)
 
     # Physical barriers
-    physical_barriers = data.get("environmental_logic", {}).get("physical_barriers", "")
+    physical_barriers = env.get("physical_barriers", "")
     if physical_barriers:
         parts.append("Physical Barriers: " + physical_barriers)
 
     # Reasoning trace triples (summarized as situation + intent)
-    triples = data.get("reasoning_trace_triples", [])
-    triple_summaries = []
-    for triple in triples:
-        situation = triple.get("situation", "")
-        intent = triple.get("intent", "")
-        if situation or intent:
-            triple_summaries.append(f"{situation} [{intent}]")
+    triple_summaries = [
+        f"{t.get('situation', '')} [{t.get('intent', '')}]"
+        for t in data.get("reasoning_trace_triples", [])
+        if t.get("situation") or t.get("intent")
+    ]
     if triple_summaries:
         parts.append("Reasoning: " + "; ".join(triple_summaries))
 
@@ -57,17 +68,7 @@ def build_document_string(data: dict) -> str:
     elif isinstance(chaos_signals, str):
         parts.append("Chaos Signals: " + chaos_signals)
 
-    return " | ".join(parts)
-
-
-def build_metadata_dict(data: dict, raw_json: str) -> dict:
-    """
-    Builds the ChromaDB metadata dict. ChromaDB only accepts str, int, or float.
-    Includes raw_json payload so the LLM can receive the full case in Phase 2.
-    """
-    header = data.get("case_header", {})
-    clinical = data.get("clinical_logic", {})
-    env = data.get("environmental_logic", {})
+    # ── Metadata ──
 
     # complexity_score → int
     try:
@@ -75,9 +76,6 @@ def build_metadata_dict(data: dict, raw_json: str) -> dict:
     except (ValueError, TypeError):
         complexity_score = 0
 
-    # outcome → str
-    outcome = str(header.get("outcome", "Unknown"))
-
     # has_skilled_need → "Yes" or "No"
     skilled_need = clinical.get("skilled_need_verified", "No")
     has_skilled_need = "Yes" if str(skilled_need).strip().lower() in ("yes", "true", "1") else "No"
@@ -89,13 +87,35 @@ def build_metadata_dict(data: dict, raw_json: str) -> dict:
     else:
         primary_friction = str(modification) if modification else "Unknown"
 
-    return {
+    metadata = {
         "complexity_score": complexity_score,
-        "outcome": outcome,
+        "outcome": str(header.get("outcome", "Unknown")),
         "has_skilled_need": has_skilled_need,
         "primary_friction": primary_friction,
         "raw_json": raw_json,
     }
+    return " | ".join(parts), metadata
+
+
+def _load_seed_case(entry: os.DirEntry) -> tuple:
+    """Read one seed file and return (case_id, document_string, metadata)."""
+    filename = entry.name
+    print(f"  Loading: {filename}")
+
+    with open(entry.path, "rb") as f:
+        raw = f.read()
+    data = orjson.loads(raw)
+
+    # a. Build unique case_id from filename (avoids duplicates across navigators)
+    case_id = filename.replace(".json", "")
+
+    # b. The file text itself is the payload; no need to re-serialize the parsed copy
+    raw_json = raw.decode("utf-8")
+
+    # c. Build searchable document string and metadata
+    document_string, metadata = build_document_and_metadata(data, raw_json)
+
+    return case_id, document_string, metadata
 
 
 def ingest_seed_cases():
@@ -105,46 +125,32 @@ def ingest_seed_cases():
     # 2. Get or create collection (Chroma auto-generates embeddings)
     collection = client.get_or_create_collection(name=COLLECTION_NAME)
 
-    seed_files = [
-        f for f in os.listdir(SEED_CASES_DIR)
-        if f.endswith(".json")
-    ]
+    with os.scandir(SEED_CASES_DIR) as it:
+        seed_files = [e for e in it if e.name.endswith(".json") and e.is_file()]
 
     if not seed_files:
         print(f"No JSON files found in {SEED_CASES_DIR}. Add seed case files and re-run.")
         return
 
-    ids = []
-    documents = []
-    metadatas = []
-
-    for filename in seed_files:
-        filepath = os.path.join(SEED_CASES_DIR, filename)
-        print(f"  Loading: {filename}")
-
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # a. Build unique case_id from filename (avoids duplicates across navigators)
-        case_id = filename.replace(".json", "")
-
-        # b. Build searchable document string
-        document_string = build_document_string(data)
-
-        # c. Serialize full JSON for the payload
-        raw_json = json.dumps(data)
-
-        # d. Build metadata
-        metadata = build_metadata_dict(data, raw_json)
-
-        ids.append(case_id)
-        documents.append(document_string)
-        metadatas.append(metadata)
-
-    # 4. Upsert batch into ChromaDB
-    collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
-
-    print(f"\nIngestion complete: {len(ids)} case(s) upserted into '{COLLECTION_NAME}' collection.")
+    total = 0
+
+    # 3. Read and parse seed files in parallel, INGEST_BATCH files at a time;
+    #    map() only runs over the current window, so at most one batch of
+    #    parsed cases is held in memory. map() keeps directory order.
+    with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as ex:
+        for start in range(0, len(seed_files), INGEST_BATCH):
+            window = seed_files[start:start + INGEST_BATCH]
+            ids, documents, metadatas = [], [], []
+            for case_id, document_string, metadata in ex.map(_load_seed_case, window):
+                ids.append(case_id)
+                documents.append(document_string)
+                metadatas.append(metadata)
+
+            # 4. Upsert the window into ChromaDB before parsing the next one
+            collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+            total += len(ids)
+
+    print(f"\nIngestion complete: {total} case(s) upserted into '{COLLECTION_NAME}' collection.")
     print(f"ChromaDB stored at: {CHROMA_DB_PATH}")
 
 
@@ -7,6 +7,8 @@ Usage:
     streamlit run streamlit_app.py
 """
 
+import importlib
+
 import streamlit as st
 
 st.set_page_config(
@@ -14,51 +16,80 @@ st.set_page_config(
     layout="wide",
 )
 
-from app.auth import is_authenticated, get_role, sign_out
-from app.pages import login, admin_dashboard, pn_dashboard, annotation, rlhf_qa
+from app.auth import is_authenticated, get_role, get_role_display, sign_out
+
+
+# page key -> role required to view it (None = open to everyone)
+PAGES = {
+    "login": None,
+    "admin_dashboard": None,
+    "pn_dashboard": "navigator",
+    "annotation": "navigator",
+    "rlhf_qa": "navigator",
+}
+
+
+# Sidebar label for each page that can be navigated to directly
+NAV_LABELS = {
+    "login": "Sign In / Register",
+    "admin_dashboard": "Admin Dashboard",
+    "pn_dashboard": "My Cases",
+    "rlhf_qa": "RLHF Q&A",
+    "annotation": "Current Evaluation",
+}
 
 
 def render_sidebar():
     """Render sidebar navigation — all pages always visible."""
+    authenticated = is_authenticated()
+
     with st.sidebar:
         st.title("Navigation")
 
-        if is_authenticated():
+        if authenticated:
             st.write(f"Signed in as **{st.session_state.get('full_name', '')}**")
-            role_display = "Patient Navigator" if get_role() == "navigator" else get_role().title()
-            st.write(f"Role: `{role_display}`")
+            st.write(f"Role: `{get_role_display()}`")
             st.divider()
 
-        if st.button("Sign In / Register", use_container_width=True):
-            st.session_state["current_page"] = "login"
-            st.rerun()
-
-        if st.button("Admin Dashboard", use_container_width=True):
-            st.session_state["current_page"] = "admin_dashboard"
-            st.rerun()
-
-        if st.button("My Cases", use_container_width=True):
-            st.session_state["current_page"] = "pn_dashboard"
-            st.rerun()
-
-        if is_authenticated():
-            if st.button("RLHF Q&A", use_container_width=True):
-                st.session_state["current_page"] = "rlhf_qa"
-                st.rerun()
-
+        nav = ["login", "admin_dashboard", "pn_dashboard"]
+        if authenticated:
+            nav.append("rlhf_qa")
         if st.session_state.get("current_session_id"):
-            if st.button("Current Evaluation", use_container_width=True):
-                st.session_state["current_page"] = "annotation"
-                st.rerun()
-
-        if is_authenticated():
+            nav.append("annotation")
+
+        # No widget key: pages also set current_page (e.g. opening a case), and
+        # a keyed widget's state cannot be written after it is drawn. Instead
+        # the radio follows current_page via index, and a differing choice is
+        # a user click. main() reads current_page after this, so no st.rerun().
+        current = st.session_state.get("current_page")
+        choice = st.radio(
+            "Go to",
+            nav,
+            index=nav.index(current) if current in nav else None,
+            format_func=NAV_LABELS.get,
+            label_visibility="collapsed",
+        )
+        if choice is not None and choice != current:
+            st.session_state["current_page"] = choice
+
+        if authenticated:
             st.divider()
             if st.button("Logout", use_container_width=True):
                 sign_out()
                 st.session_state["current_page"] = "login"
+                # Rerun so the signed-in details drawn above are cleared
                 st.rerun()
 
 
+def _render(page: str):
+    """Import a page module on first use and render it.
+
+    Pages are imported lazily so a session only pays for the modules it visits;
+    `page` must be a key of PAGES.
+    """
+    importlib.import_module(f"app.pages.{page}").render()
+
+
 def _require_auth(role=None):
     """Show sign-in prompt if not authenticated or wrong role. Returns True if blocked."""
     if not is_authenticated():
@@ -77,22 +108,13 @@ def main():
     render_sidebar()
 
     page = st.session_state["current_page"]
+    if page not in PAGES:
+        page = "login"
 
-    if page == "login":
-        login.render()
-    elif page == "admin_dashboard":
-        admin_dashboard.render()
-    elif page == "pn_dashboard":
-        if not _require_auth("navigator"):
-            pn_dashboard.render()
-    elif page == "annotation":
-        if not _require_auth("navigator"):
-            annotation.render()
-    elif page == "rlhf_qa":
-        if not _require_auth("navigator"):
-            rlhf_qa.render()
-    else:
-        login.render()
+    required_role = PAGES[page]
+    if required_role and _require_auth(required_role):
+        return
+    _render(page)
 
 
 if __name__ == "__main__":
@@ -2124,3 +2124,194 @@ CREATE POLICY "Navigators manage own f3_RLHF_feedback"
     ON f3_RLHF_feedback FOR ALL
     USING (navigator_id = auth.uid())
     WITH CHECK (navigator_id = auth.uid());
+
+
+-- ============================================================================
+-- V15 RPC FUNCTIONS
+-- ============================================================================
+
+-- One answer row per (session, item) so saves can upsert instead of
+-- deleting and re-inserting every row.
+-- The old delete-then-insert saves were separate, non-transactional calls,
+-- so overlapping saves may have left duplicate (session, item) rows, which
+-- would make ADD CONSTRAINT fail. Each DELETE below keeps only the newest
+-- row per (session, item). The tables have no timestamp column, so "newest"
+-- is the row written by the latest transaction (xmin), then the later ctid.
+ALTER TABLE eval_format_1_timeline_v15
+    DROP CONSTRAINT IF EXISTS eval_format_1_timeline_v15_session_event_key;
+DELETE FROM eval_format_1_timeline_v15 a
+    USING eval_format_1_timeline_v15 b
+    WHERE a.session_id = b.session_id
+      AND a.event_index = b.event_index
+      AND (a.xmin::text::bigint, a.ctid) < (b.xmin::text::bigint, b.ctid);
+ALTER TABLE eval_format_1_timeline_v15
+    ADD CONSTRAINT eval_format_1_timeline_v15_session_event_key UNIQUE (session_id, event_index);
+
+ALTER TABLE eval_format_2_tactics_v15
+    DROP CONSTRAINT IF EXISTS eval_format_2_tactics_v15_session_triple_key;
+DELETE FROM eval_format_2_tactics_v15 a
+    USING eval_format_2_tactics_v15 b
+    WHERE a.session_id = b.session_id
+      AND a.triple_index = b.triple_index
+      AND (a.xmin::text::bigint, a.ctid) < (b.xmin::text::bigint, b.ctid);
+ALTER TABLE eval_format_2_tactics_v15
+    ADD CONSTRAINT eval_format_2_tactics_v15_session_triple_key UNIQUE (session_id, triple_index);
+
+ALTER TABLE eval_format_3_boundaries_v15
+    DROP CONSTRAINT IF EXISTS eval_format_3_boundaries_v15_session_option_key;
+DELETE FROM eval_format_3_boundaries_v15 a
+    USING eval_format_3_boundaries_v15 b
+    WHERE a.session_id = b.session_id
+      AND a.option_index = b.option_index
+      AND (a.xmin::text::bigint, a.ctid) < (b.xmin::text::bigint, b.ctid);
+ALTER TABLE eval_format_3_boundaries_v15
+    ADD CONSTRAINT eval_format_3_boundaries_v15_session_option_key UNIQUE (session_id, option_index);
+
+-- fill_eval_denorm_fields_v15: copy case_label / navigator_name onto new
+-- eval_format_*_v15 rows from their session, so clients only send the answers.
+CREATE OR REPLACE FUNCTION public.fill_eval_denorm_fields_v15()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT s.case_label, s.navigator_name
+    INTO NEW.case_label, NEW.navigator_name
+    FROM evaluation_sessions_v15 s
+    WHERE s.id = NEW.session_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS fill_denorm_fields ON eval_format_1_timeline_v15;
+CREATE TRIGGER fill_denorm_fields
+    BEFORE INSERT ON eval_format_1_timeline_v15
+    FOR EACH ROW EXECUTE FUNCTION public.fill_eval_denorm_fields_v15();
+
+DROP TRIGGER IF EXISTS fill_denorm_fields ON eval_format_2_tactics_v15;
+CREATE TRIGGER fill_denorm_fields
+    BEFORE INSERT ON eval_format_2_tactics_v15
+    FOR EACH ROW EXECUTE FUNCTION public.fill_eval_denorm_fields_v15();
+
+DROP TRIGGER IF EXISTS fill_denorm_fields ON eval_format_3_boundaries_v15;
+CREATE TRIGGER fill_denorm_fields
+    BEFORE INSERT ON eval_format_3_boundaries_v15
+    FOR EACH ROW EXECUTE FUNCTION public.fill_eval_denorm_fields_v15();
+
+-- save_evaluation: upsert a session's eval_format_*_v15 rows and update its
+-- overall assessment in one transaction. Called by the annotation page on
+-- autosave so each save is a single round trip. p_f1 / p_f2 / p_f3 are JSON
+-- arrays shaped like the per-format input dicts and only need to contain the
+-- rows that changed; case_label and navigator_name are filled in by the
+-- fill_eval_denorm_fields_v15 trigger above. p_finalize also marks the session
+-- completed, so Submit is the same single call.
+DROP FUNCTION IF EXISTS public.save_evaluation(UUID, INT, TEXT, TEXT, JSONB, JSONB, JSONB, JSONB);
+DROP FUNCTION IF EXISTS public.save_evaluation(UUID, INT, TEXT, TEXT, JSONB, JSONB, JSONB, JSONB, BOOLEAN);
+CREATE OR REPLACE FUNCTION public.save_evaluation(
+    p_session_id    UUID,
+    p_overall       INT,
+    p_reasoning     TEXT,
+    p_suggestion    TEXT,
+    p_f1            JSONB,
+    p_f2            JSONB,
+    p_f3            JSONB,
+    p_finalize      BOOLEAN DEFAULT FALSE
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO eval_format_1_timeline_v15 (
+        session_id, event_index, clinical_impact,
+        environmental_impact, home_service_adoption_impact, edd_delta, bottleneck_realism
+    )
+    SELECT p_session_id, r.event_index, r.clinical_impact, r.environmental_impact,
+           r.home_service_adoption_impact, r.edd_delta, r.bottleneck_realism
+    FROM jsonb_to_recordset(COALESCE(p_f1, '[]'::jsonb)) AS r(
+        event_index INT, clinical_impact TEXT, environmental_impact TEXT,
+        home_service_adoption_impact TEXT, edd_delta TEXT, bottleneck_realism BOOLEAN
+    )
+    ON CONFLICT (session_id, event_index) DO UPDATE
+    SET clinical_impact = EXCLUDED.clinical_impact,
+        environmental_impact = EXCLUDED.environmental_impact,
+        home_service_adoption_impact = EXCLUDED.home_service_adoption_impact,
+        edd_delta = EXCLUDED.edd_delta,
+        bottleneck_realism = EXCLUDED.bottleneck_realism;
+
+    INSERT INTO eval_format_2_tactics_v15 (
+        session_id, triple_index, tactical_viability_score
+    )
+    SELECT p_session_id, r.triple_index, r.tactical_viability_score
+    FROM jsonb_to_recordset(COALESCE(p_f2, '[]'::jsonb)) AS r(
+        triple_index INT, tactical_viability_score INT
+    )
+    ON CONFLICT (session_id, triple_index) DO UPDATE
+    SET tactical_viability_score = EXCLUDED.tactical_viability_score;
+
+    INSERT INTO eval_format_3_boundaries_v15 (
+        session_id, option_index, pn_category, ai_intended_category
+    )
+    SELECT p_session_id, r.option_index, r.pn_category, r.ai_intended_category
+    FROM jsonb_to_recordset(COALESCE(p_f3, '[]'::jsonb)) AS r(
+        option_index INT, pn_category TEXT, ai_intended_category TEXT
+    )
+    ON CONFLICT (session_id, option_index) DO UPDATE
+    SET pn_category = EXCLUDED.pn_category,
+        ai_intended_category = EXCLUDED.ai_intended_category;
+
+    UPDATE evaluation_sessions_v15
+    SET overall_field_authenticity = p_overall,
+        authenticity_reasoning = p_reasoning,
+        improvement_suggestion = p_suggestion,
+        status = CASE WHEN p_finalize THEN 'completed' ELSE status END,
+        completed_at = CASE WHEN p_finalize THEN now() ELSE completed_at END
+    WHERE id = p_session_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- get_saved_answers: all of a session's eval_format_*_v15 rows in one call,
+-- as {"f1": [...], "f2": [...], "f3": [...]} ordered by item index. Runs as the
+-- caller, so the navigator RLS policies above still apply.
+CREATE OR REPLACE FUNCTION public.get_saved_answers(p_session_id UUID)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'f1', COALESCE((SELECT jsonb_agg(t ORDER BY t.event_index)
+                        FROM eval_format_1_timeline_v15 t
+                        WHERE t.session_id = p_session_id), '[]'::jsonb),
+        'f2', COALESCE((SELECT jsonb_agg(t ORDER BY t.triple_index)
+                        FROM eval_format_2_tactics_v15 t
+                        WHERE t.session_id = p_session_id), '[]'::jsonb),
+        'f3', COALESCE((SELECT jsonb_agg(t ORDER BY t.option_index)
+                        FROM eval_format_3_boundaries_v15 t
+                        WHERE t.session_id = p_session_id), '[]'::jsonb)
+    );
+$$ LANGUAGE sql STABLE;
+
+-- navigator_progress_v15: per-navigator session counts for the admin
+-- dashboard, so it no longer downloads every evaluation_sessions_v15 row.
+CREATE OR REPLACE VIEW navigator_progress_v15
+WITH (security_invoker = true) AS
+SELECT
+    navigator_id,
+    COUNT(*) FILTER (WHERE status = 'completed')   AS completed,
+    COUNT(*) FILTER (WHERE status = 'in_progress') AS in_progress
+FROM evaluation_sessions_v15
+GROUP BY navigator_id;
+
+-- get_my_profile: the signed-in user's role and name, read through the
+-- "Navigators read own profile" policy so login never needs the service key.
+-- id is returned so the caller can confirm the row belongs to the user it
+-- just signed in (the app's anon client is shared across sessions).
+DROP FUNCTION IF EXISTS public.get_my_profile();
+CREATE FUNCTION public.get_my_profile()
+RETURNS TABLE (id UUID, role TEXT, full_name TEXT) AS $$
+    SELECT p.id, p.role, p.full_name FROM profiles p WHERE p.id = auth.uid();
+$$ LANGUAGE sql STABLE;
+
+-- content_hash: SHA-256 of the source case file, so upload_cases.py can
+-- re-run without duplicating cases it has already uploaded.
+-- Rows uploaded before this column existed keep content_hash NULL, and the
+-- hash is of the file bytes, so it can't be backfilled here. The first
+-- upload after this migration therefore re-inserts every case already
+-- stored; delete the NULL-hash rows first (if no evaluations reference
+-- them) or expect one round of duplicates.
+ALTER TABLE synthetic_cases_v15 ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE synthetic_cases_v15
+    DROP CONSTRAINT IF EXISTS synthetic_cases_v15_content_hash_key;
+ALTER TABLE synthetic_cases_v15
+    ADD CONSTRAINT synthetic_cases_v15_content_hash_key UNIQUE (content_hash);
@@ -6,62 +6,190 @@ Usage:
 
 Requires SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in .env
 (service_role key bypasses RLS for batch inserts).
+
+Re-runs skip cases whose content_hash (SHA-256 of the file) is already
+stored. Rows uploaded before the content_hash column was added have it
+NULL, so the first run after that migration inserts those cases again;
+see the content_hash note in supabase_schema.sql.
+
+Optional: case files larger than LARGE_FILE_BYTES are stream-parsed with
+ijson (`pip install ijson`) so only the uploaded keys are materialized.
+Without it they are read and parsed whole.
+
+Optional: set SUPABASE_DB_URL (the direct Postgres connection string) to
+bulk-load with COPY instead of PostgREST inserts. Needs `pip install
+"psycopg[binary]"`.
+
+Optional: set UPLOAD_GZIP=1 to gzip PostgREST insert bodies. Only use it
+behind a proxy that decompresses request bodies; PostgREST and the hosted
+Supabase gateway don't.
 """
 
-import json
+import gzip
+import hashlib
+import httpx
+import mmap
+import orjson
 import os
+from concurrent.futures import ThreadPoolExecutor
+from glob import iglob
 from dotenv import load_dotenv
-from supabase import create_client
 
 load_dotenv()
 
 SYNTHETIC_DIR = "./data/synthetic_batch_25_v15"
 BATCH_ID = "synthetic_batch_25_v15"
 TABLE_NAME = "synthetic_cases_v15"
+INSERT_CHUNK = 1000  # rows per PostgREST insert request
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+HTTP_TIMEOUT = 60.0
+READ_WORKERS = 16
+JSON_COLUMNS = {"format_1_state_log", "format_2_triples", "format_3_rl_scenario"}
+MMAP_MIN_BYTES = 1 << 20  # below this, mmap setup costs more than read() copies
+LARGE_FILE_BYTES = 10_000_000
+UPLOAD_GZIP = os.getenv("UPLOAD_GZIP") == "1"
+CASE_KEYS = {
+    "role_delineation_check", "atlantis_entry_confirmed", "demographic_audit_note",
+    "home_vs_ltc_goal", "v_card_flyer_status", "pre_dc_pulse_call", "atlantis_final_sync",
+    "narrative_summary", "format_1_state_log", "format_2_triples", "format_3_rl_scenario",
+    "case_outcome",
+}
 
 
-def main():
+def _load_case(filepath: str) -> tuple:
+    """Parse a case file and return (data, sha256 hex of its bytes).
+
+    Very large files are streamed and only CASE_KEYS are kept, when ijson
+    is installed; otherwise they are parsed whole like any other file.
+    """
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if MMAP_MIN_BYTES <= size <= LARGE_FILE_BYTES:
+            # Parse and hash straight from the page cache instead of copying into a read() buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as raw:
+                return orjson.loads(raw), hashlib.sha256(raw).hexdigest()
+        if size > LARGE_FILE_BYTES:
+            try:
+                import ijson
+            except ImportError:
+                ijson = None  # not installed; parse the whole file below
+            if ijson is not None:
+                digest = hashlib.sha256()
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+                f.seek(0)
+                return {k: v for k, v in ijson.kvitems(f, "", use_float=True) if k in CASE_KEYS}, digest.hexdigest()
+
+        raw = f.read()
+        return orjson.loads(raw), hashlib.sha256(raw).hexdigest()
+
+
+def _build_row(idx: int, filepath: str) -> dict:
+    """Read one case file and map it to a synthetic_cases_v15 row."""
+    data, content_hash = _load_case(filepath)
+
+    return {
+        "batch_id": BATCH_ID,
+        "label": f"Case_{idx}",
+        "content_hash": content_hash,
+        # Cognitive Delineation
+        "role_delineation_check": data.get("role_delineation_check", ""),
+        # Stage 1
+        "atlantis_entry_confirmed": data.get("atlantis_entry_confirmed", False),
+        "demographic_audit_note": data.get("demographic_audit_note", ""),
+        "home_vs_ltc_goal": data.get("home_vs_ltc_goal", ""),
+        # Stage 2
+        "v_card_flyer_status": data.get("v_card_flyer_status", ""),
+        # Stage 3
+        "pre_dc_pulse_call": data.get("pre_dc_pulse_call", ""),
+        "atlantis_final_sync": data.get("atlantis_final_sync", ""),
+        # Core content
+        "narrative_summary": data.get("narrative_summary", ""),
+        "format_1_state_log": data.get("format_1_state_log", []),
+        "format_2_triples": data.get("format_2_triples", []),
+        "format_3_rl_scenario": data.get("format_3_rl_scenario", []),
+        "case_outcome": data.get("case_outcome", ""),
+    }
+
+
+def _copy_rows(db_url: str, rows: list) -> int:
+    """Bulk-load rows with COPY over a direct Postgres connection.
+
+    COPY cannot skip conflicts, so rows land in a temp table first and are
+    moved over with ON CONFLICT (content_hash) DO NOTHING.
+    """
+    import psycopg
+    from psycopg.types.json import Jsonb, set_json_dumps
+
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+    with psycopg.connect(db_url) as conn, conn.cursor() as cur:
+        # Encode the JSONB columns with orjson rather than the stdlib encoder
+        set_json_dumps(orjson.dumps, context=conn)
+        cur.execute(f"CREATE TEMP TABLE upload_staging (LIKE {TABLE_NAME} INCLUDING DEFAULTS) ON COMMIT DROP")
+        with cur.copy(f"COPY upload_staging ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([Jsonb(row[c]) if c in JSON_COLUMNS else row[c] for c in columns])
+        cur.execute(
+            f"INSERT INTO {TABLE_NAME} ({column_list}) SELECT {column_list} FROM upload_staging "
+            "ON CONFLICT (content_hash) DO NOTHING"
+        )
+        return cur.rowcount
+
+
+def _insert_rows(rows: list) -> int:
+    """Insert rows through PostgREST in INSERT_CHUNK-sized requests over one keep-alive pool.
+
+    Each chunk is encoded once with orjson and POSTed straight to the REST
+    endpoint, skipping the SDK's stdlib re-encode of the row dicts. Rows whose
+    content_hash is already stored are skipped server-side; only the ids of
+    newly inserted rows come back, to count them.
+    """
     url = os.environ["SUPABASE_URL"]
     key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", os.environ["SUPABASE_KEY"])
-    client = create_client(url, key)
+    headers = {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+        "Prefer": "resolution=ignore-duplicates,return=representation",
+    }
+
+    params = {"on_conflict": "content_hash", "select": "id"}
 
-    files = sorted([
-        f for f in os.listdir(SYNTHETIC_DIR)
-        if f.endswith(".json")
-    ])
+    inserted = 0
+    with httpx.Client(base_url=f"{url}/rest/v1", headers=headers, limits=HTTP_LIMITS,
+                      timeout=HTTP_TIMEOUT, follow_redirects=True) as http:
+        for start in range(0, len(rows), INSERT_CHUNK):
+            body = orjson.dumps(rows[start:start + INSERT_CHUNK])
+            if UPLOAD_GZIP:
+                # Repetitive case JSON compresses well; level 1 is nearly free next to the upload
+                resp = http.post(f"/{TABLE_NAME}", params=params, content=gzip.compress(body, compresslevel=1),
+                                 headers={"Content-Encoding": "gzip"})
+            else:
+                resp = http.post(f"/{TABLE_NAME}", params=params, content=body)
+            resp.raise_for_status()
+            inserted += len(resp.json())
+    return inserted
+
+
+def main():
+    files = sorted(iglob(os.path.join(SYNTHETIC_DIR, "*.json")))
 
     print(f"Found {len(files)} JSON files in {SYNTHETIC_DIR}")
 
-    rows = []
-    for idx, filename in enumerate(files, start=1):
-        filepath = os.path.join(SYNTHETIC_DIR, filename)
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        rows.append({
-            "batch_id": BATCH_ID,
-            "label": f"Case_{idx}",
-            # Cognitive Delineation
-            "role_delineation_check": data.get("role_delineation_check", ""),
-            # Stage 1
-            "atlantis_entry_confirmed": data.get("atlantis_entry_confirmed", False),
-            "demographic_audit_note": data.get("demographic_audit_note", ""),
-            "home_vs_ltc_goal": data.get("home_vs_ltc_goal", ""),
-            # Stage 2
-            "v_card_flyer_status": data.get("v_card_flyer_status", ""),
-            # Stage 3
-            "pre_dc_pulse_call": data.get("pre_dc_pulse_call", ""),
-            "atlantis_final_sync": data.get("atlantis_final_sync", ""),
-            # Core content
-            "narrative_summary": data.get("narrative_summary", ""),
-            "format_1_state_log": data.get("format_1_state_log", []),
-            "format_2_triples": data.get("format_2_triples", []),
-            "format_3_rl_scenario": data.get("format_3_rl_scenario", []),
-            "case_outcome": data.get("case_outcome", ""),
-        })
-
-    result = client.table(TABLE_NAME).insert(rows).execute()
-    print(f"Inserted {len(result.data)} rows into {TABLE_NAME}.")
+    # Files are independent; read and parse them in parallel, keeping sorted order.
+    # The row count is known up front, so fill a pre-sized list in place.
+    rows = [None] * len(files)
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as ex:
+        for i, row in enumerate(ex.map(_build_row, range(1, len(files) + 1), files)):
+            rows[i] = row
+
+    if not rows:
+        return
+
+    db_url = os.environ.get("SUPABASE_DB_URL")
+    inserted = _copy_rows(db_url, rows) if db_url else _insert_rows(rows)
+    print(f"Inserted {inserted} rows into {TABLE_NAME} ({len(rows) - inserted} already uploaded, skipped).")
     print("Upload complete.")
 
 